@@ -0,0 +1,220 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import six
+import mmap
+import struct
+import zipfile
+import posixpath
+
+
+# Module API
+
+class Archive(object):
+    """Zip archive read in place (members are never extracted)
+
+    Members are addressed by pseudo paths under the archive's `root`
+    (e.g. `/data/package.zip/data/cities.csv`) so they can be used as
+    local resource paths. Stored (uncompressed) members of an archive
+    on disk are read via a memory map, compressed ones are decompressed
+    on the fly.
+
+    # Arguments
+        source (str/filelike): zip file path or seekable file-like object
+        root (str): pseudo path of the archive (absolute source path by default)
+        close_source (bool): close file-like source on closing the archive
+
+    # Raises
+        zipfile.BadZipfile: raises if the source is not a zip archive
+
+    """
+
+    # Public
+
+    def __init__(self, source, root=None, close_source=False):
+        if root is None:
+            root = os.path.abspath(source) if isinstance(source, six.string_types) else '<zip>'
+        self.__root = root
+        self.__zip = zipfile.ZipFile(source, 'r')
+        self.__names = set(self.__zip.namelist())
+        self.__file = None
+        self.__mapping = None
+        self.__source = source if close_source else None
+        if isinstance(source, six.string_types):
+            try:
+                self.__file = io.open(source, 'rb')
+                self.__mapping = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (IOError, OSError, ValueError):
+                self.__mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    @property
+    def root(self):
+        """Pseudo path of the archive
+
+        # Returns
+            str: pseudo path used as a prefix for members' paths
+
+        """
+        return self.__root
+
+    @property
+    def closed(self):
+        """Whether the archive is closed
+
+        # Returns
+            bool: True if closed
+
+        """
+        return self.__zip is None
+
+    def namelist(self):
+        """List of members
+
+        # Returns
+            str[]: members' names
+
+        """
+        return self.__zip.namelist()
+
+    def get_member(self, path):
+        """Get member name for a pseudo path
+
+        # Arguments
+            path (str): pseudo path under the archive's root
+
+        # Returns
+            str/None: member name or None if it's not a member
+
+        """
+        prefix = self.__root.rstrip(os.sep) + os.sep
+        if not isinstance(path, six.string_types) or not path.startswith(prefix):
+            return None
+        name = posixpath.normpath(path[len(prefix):].replace(os.sep, '/'))
+        return name if name in self.__names else None
+
+    def getinfo(self, name):
+        """Get member info
+
+        # Arguments
+            name (str): member name
+
+        # Returns
+            zipfile.ZipInfo: member info
+
+        """
+        return self.__zip.getinfo(name)
+
+    def open(self, name):
+        """Open member for binary reading
+
+        # Arguments
+            name (str): member name
+
+        # Returns
+            filelike: seekable binary stream
+
+        """
+        info = self.__zip.getinfo(name)
+        offset = self.__get_mapped_offset(info)
+        if offset is not None:
+            return io.BufferedReader(_MappedFile(self.__mapping, offset, info.file_size))
+        return self.__zip.open(name)
+
+    def read(self, name):
+        """Read member contents
+
+        # Arguments
+            name (str): member name
+
+        # Returns
+            bytes: member contents
+
+        """
+        with self.open(name) as file:
+            return file.read()
+
+    def close(self):
+        """Close the archive (and the source if it's been opened from a path)
+        """
+        if self.__mapping is not None:
+            self.__mapping.close()
+            self.__mapping = None
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+        if self.__zip is not None:
+            self.__zip.close()
+            self.__zip = None
+        if self.__source is not None:
+            self.__source.close()
+            self.__source = None
+
+    # Private
+
+    def __get_mapped_offset(self, info):
+        if self.__mapping is None:
+            return None
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            return None
+        start = info.header_offset
+        header = self.__mapping[start:start + zipfile.sizeFileHeader]
+        if len(header) != zipfile.sizeFileHeader:
+            return None
+        header = struct.unpack(zipfile.structFileHeader, header)
+        if header[0] != zipfile.stringFileHeader:
+            return None
+        offset = start + zipfile.sizeFileHeader + header[10] + header[11]
+        if offset + info.file_size > len(self.__mapping):
+            return None
+        return offset
+
+
+# Internal
+
+class _MappedFile(io.RawIOBase):
+    """Read-only file-like view of a memory map region
+    """
+
+    # Public
+
+    def __init__(self, mapping, start, size):
+        self.__mapping = mapping
+        self.__start = start
+        self.__size = size
+        self.__position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.__position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.__position
+        elif whence == io.SEEK_END:
+            offset += self.__size
+        self.__position = max(0, offset)
+        return self.__position
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.__size - self.__position)
+        if size <= 0:
+            return 0
+        start = self.__start + self.__position
+        buffer[:size] = self.__mapping[start:start + size]
+        self.__position += size
+        return size
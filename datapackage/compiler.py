@@ -0,0 +1,345 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import re
+import six
+import json
+import hashlib
+import tempfile
+from . import config
+
+
+# Module API
+
+def compile_schema(schema, validator_class, cache_dir=None):
+    """Compile JSON Schema to a specialized validity check function
+
+    The returned function takes a descriptor and returns `True` only if
+    it's valid against the schema. `False` means the descriptor might be
+    invalid so `jsonschema` has to be used to get the errors. It makes
+    the check a pure speed-up without changing errors' messages or paths.
+
+    The generated source is cached on disk per schema hash.
+
+    # Arguments
+        schema (dict): JSON Schema
+        validator_class (type): jsonschema validator class used for the schema
+        cache_dir (str): directory to cache generated source (`config.COMPILED_PROFILES_DIR` by default)
+
+    # Returns
+        func/None: check function or None if the schema can't be compiled
+
+    """
+    if cache_dir is None:
+        cache_dir = config.COMPILED_PROFILES_DIR
+
+    # Type checkers are available since jsonschema 3.0
+    type_checker = getattr(validator_class, 'TYPE_CHECKER', None)
+    if type_checker is None:
+        return None
+
+    # Get source
+    key = _get_schema_hash(schema, validator_class)
+    path = os.path.join(cache_dir, '%s.py' % key) if cache_dir else None
+    source = _read_source(path)
+    if source is None:
+        source = _Generator(validator_class).generate(schema)
+        if source is None:
+            return None
+        _write_source(path, source)
+
+    # Build function
+    namespace = {
+        '_is_type': type_checker.is_type,
+        '_string_types': six.string_types,
+        '_Undecided': _Undecided,
+        '_check_unique': _check_unique,
+    }
+    six.exec_(compile(source, path or '<compiled schema>', 'exec'), namespace)
+    check = namespace['check']
+
+    return check
+
+
+# Internal
+
+_COMPILER_VERSION = '1'
+_INLINE_TYPES = {
+    'string': 'isinstance(x, _string_types)',
+    'object': 'isinstance(x, dict)',
+    'array': 'isinstance(x, list)',
+    'boolean': 'isinstance(x, bool)',
+    'null': 'x is None',
+    'integer': '_is_type(x, "integer")',
+    'number': '_is_type(x, "number")',
+}
+_SUPPORTED_KEYWORDS = [
+    'type', 'enum', 'allOf', 'anyOf', 'oneOf', 'not',
+    'required', 'properties', 'patternProperties',
+    'minItems', 'maxItems', 'uniqueItems', 'items',
+    'minLength', 'maxLength', 'pattern',
+    # Validators are created without a format checker so it's an annotation
+    'format',
+]
+
+
+class _Undecided(Exception):
+    """Raised by generated code if validity can't be decided cheaply
+    """
+    pass
+
+
+class _NotCompilable(Exception):
+    """Raised by generator if the schema uses a not supported keyword
+    """
+    pass
+
+
+class _Generator(object):
+    """Generate Python source checking validity against JSON Schema
+
+    Only keywords with exactly known semantics are supported. Keywords
+    unknown to the validator class are annotations so they're skipped
+    the same way `jsonschema` does.
+
+    """
+
+    # Public
+
+    def __init__(self, validator_class):
+        self.__keywords = set(validator_class.VALIDATORS)
+        self.__lines = []
+        self.__constants = []
+        self.__functions = {}
+
+    def generate(self, schema):
+        try:
+            name = self.__generate_function(schema)
+        except _NotCompilable:
+            return None
+        lines = ['import re', '']
+        lines.extend(self.__constants)
+        lines.append('')
+        lines.extend(self.__lines)
+        lines.extend([
+            'def check(x):',
+            '    try:',
+            '        return %s(x)' % name,
+            '    except Exception:',
+            '        return False',
+            ''])
+        return '\n'.join(lines)
+
+    # Private
+
+    def __generate_function(self, schema):
+        if not isinstance(schema, dict):
+            raise _NotCompilable()
+
+        # Reuse for identical schemas
+        key = json.dumps(schema, sort_keys=True)
+        if key in self.__functions:
+            return self.__functions[key]
+        name = '_check_%s' % len(self.__functions)
+        self.__functions[key] = name
+
+        # Check keywords
+        for keyword in schema:
+            if keyword in self.__keywords and keyword not in _SUPPORTED_KEYWORDS:
+                raise _NotCompilable()
+
+        # Generic checks
+        body = []
+        if 'type' in schema:
+            types = schema['type']
+            if isinstance(types, six.string_types):
+                types = [types]
+            if not types or any(type not in _INLINE_TYPES for type in types):
+                raise _NotCompilable()
+            body.append('if not (%s):' % ' or '.join(_INLINE_TYPES[type] for type in types))
+            body.append('    return False')
+        if 'enum' in schema:
+            enum = schema['enum']
+            if not isinstance(enum, list):
+                raise _NotCompilable()
+            if all(isinstance(item, six.string_types) for item in enum):
+                constant = self.__add_constant('frozenset(%r)' % (sorted(enum),))
+                body.append('if not (isinstance(x, _string_types) and x in %s):' % constant)
+                body.append('    return False')
+            else:
+                body.append('raise _Undecided()')
+        for keyword in ['allOf', 'anyOf', 'oneOf']:
+            if keyword in schema:
+                if not isinstance(schema[keyword], list) or not schema[keyword]:
+                    raise _NotCompilable()
+                names = [self.__generate_function(item) for item in schema[keyword]]
+                calls = ['%s(x)' % item for item in names]
+                if keyword == 'allOf':
+                    condition = ' and '.join(calls)
+                elif keyword == 'anyOf':
+                    condition = ' or '.join(calls)
+                else:
+                    condition = '[%s].count(True) == 1' % ', '.join(calls)
+                body.append('if not (%s):' % condition)
+                body.append('    return False')
+        if 'not' in schema:
+            body.append('if %s(x):' % self.__generate_function(schema['not']))
+            body.append('    return False')
+
+        # Type specific checks
+        for type, keywords in [
+                ('isinstance(x, dict)', ['required', 'properties', 'patternProperties']),
+                ('isinstance(x, list)', ['minItems', 'maxItems', 'uniqueItems', 'items']),
+                ('isinstance(x, _string_types)', ['minLength', 'maxLength', 'pattern'])]:
+            checks = []
+            for keyword in keywords:
+                if keyword in schema:
+                    generate = getattr(self, '_Generator__generate_%s' % keyword)
+                    checks.extend(generate(schema[keyword]))
+            if checks:
+                body.append('if %s:' % type)
+                body.extend('    %s' % line for line in checks)
+
+        # Add function
+        body.append('return True')
+        self.__lines.append('def %s(x):' % name)
+        self.__lines.extend('    %s' % line for line in body)
+        self.__lines.append('')
+
+        return name
+
+    def __add_constant(self, expression):
+        name = '_constant_%s' % len(self.__constants)
+        self.__constants.append('%s = %s' % (name, expression))
+        return name
+
+    def __add_pattern(self, pattern):
+        if not isinstance(pattern, six.string_types):
+            raise _NotCompilable()
+        try:
+            re.compile(pattern)
+        except re.error:
+            raise _NotCompilable()
+        return self.__add_constant('re.compile(%r)' % (pattern,))
+
+    def __generate_required(self, value):
+        if not isinstance(value, list):
+            raise _NotCompilable()
+        lines = []
+        for name in value:
+            lines.append('if %r not in x:' % (name,))
+            lines.append('    return False')
+        return lines
+
+    def __generate_properties(self, value):
+        if not isinstance(value, dict):
+            raise _NotCompilable()
+        lines = []
+        for name, schema in value.items():
+            lines.append('if %r in x and not %s(x[%r]):' % (
+                name, self.__generate_function(schema), name))
+            lines.append('    return False')
+        return lines
+
+    def __generate_patternProperties(self, value):
+        if not isinstance(value, dict):
+            raise _NotCompilable()
+        lines = []
+        for pattern, schema in value.items():
+            constant = self.__add_pattern(pattern)
+            lines.append('for key, value in x.items():')
+            lines.append('    if %s.search(key) and not %s(value):' % (
+                constant, self.__generate_function(schema)))
+            lines.append('        return False')
+        return lines
+
+    def __generate_minItems(self, value):
+        return _generate_length_check('<', value)
+
+    def __generate_maxItems(self, value):
+        return _generate_length_check('>', value)
+
+    def __generate_uniqueItems(self, value):
+        if value is not True and value is not False:
+            raise _NotCompilable()
+        if not value:
+            return []
+        return ['if not _check_unique(x):', '    return False']
+
+    def __generate_items(self, value):
+        if not isinstance(value, dict):
+            raise _NotCompilable()
+        return [
+            'for item in x:',
+            '    if not %s(item):' % self.__generate_function(value),
+            '        return False']
+
+    def __generate_minLength(self, value):
+        return _generate_length_check('<', value)
+
+    def __generate_maxLength(self, value):
+        return _generate_length_check('>', value)
+
+    def __generate_pattern(self, value):
+        constant = self.__add_pattern(value)
+        return ['if not %s.search(x):' % constant, '    return False']
+
+
+def _generate_length_check(operator, value):
+    if not isinstance(value, six.integer_types) or isinstance(value, bool):
+        raise _NotCompilable()
+    return ['if len(x) %s %s:' % (operator, value), '    return False']
+
+
+def _check_unique(items):
+    """Check items are unique (only strings are decided here)
+    """
+    if len(items) < 2:
+        return True
+    if not all(isinstance(item, six.string_types) for item in items):
+        raise _Undecided()
+    return len(set(items)) == len(items)
+
+
+def _get_schema_hash(schema, validator_class):
+    contents = json.dumps([
+        _COMPILER_VERSION,
+        validator_class.__name__,
+        six.PY2,
+        schema,
+    ], sort_keys=True)
+    return hashlib.sha1(contents.encode('utf-8')).hexdigest()
+
+
+def _read_source(path):
+    if path is None:
+        return None
+    try:
+        with io.open(path, encoding='utf-8') as file:
+            return file.read()
+    except (IOError, OSError):
+        return None
+
+
+def _write_source(path, source):
+    """Write source atomically ignoring errors (the cache is optional)
+    """
+    if path is None:
+        return
+    try:
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with io.open(handle, 'w', encoding='utf-8') as file:
+            file.write(source)
+        try:
+            os.rename(temp_path, path)
+        except OSError:
+            os.remove(temp_path)
+    except (IOError, OSError):
+        pass
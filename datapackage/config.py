@@ -15,6 +15,10 @@ REMOTE_SCHEMES = ['http', 'https', 'ftp', 'ftps', 's3']
 TABULAR_FORMATS = ['csv', 'tsv', 'xls', 'xlsx']
 DEFAULT_DATA_PACKAGE_PROFILE = 'data-package'
 DEFAULT_RESOURCE_PROFILE = 'data-resource'
+PROFILE_CACHE_SIZE = 64
+DEREFERENCE_WORKERS = 8
+COMPILED_PROFILES = False
+COMPILED_PROFILES_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'datapackage', 'profiles')
 DEFAULT_FIELD_TYPE = 'string'
 DEFAULT_FIELD_FORMAT = 'default'
 DEFAULT_MISSING_VALUES = ['']
@@ -27,6 +31,19 @@ DEFAULT_DIALECT = {
     'header': True,
     'caseSensitiveHeader': False,
 }
+HTTP_POOL_SIZE = 16
+HTTP_TIMEOUT = 60
+HTTP_RETRIES = 3
+HTTP_RETRY_BACKOFF = 0.5
+REMOTE_ZIP_SPOOL_SIZE = 32 * 1024 * 1024
+HTTP_CACHE_DIR = None
+HTTP_CACHE_TTL = 3600
+HTTP_CACHE_SIZE = 100 * 1024 * 1024
+EXTRACTION_CACHE_DIR = None
+EXTRACTION_CACHE_SIZE = 1024 * 1024 * 1024
+INTEGRITY_WORKERS = 8
+RELATIONS_MEMORY_LIMIT = None
+RELATIONS_CACHE_SIZE = 512 * 1024 * 1024
 HTTP_HEADERS = {
   'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_6) ' +
                 'AppleWebKit/537.36 (KHTML, like Gecko) ' +
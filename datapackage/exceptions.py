@@ -15,6 +15,7 @@ ValidationError = tableschema.ValidationError
 CastError = tableschema.CastError
 IntegrityError = tableschema.IntegrityError
 RelationError = tableschema.RelationError
+UnresolvedFKError = tableschema.UnresolvedFKError
 StorageError = tableschema.StorageError
 
 # We need these lines to generate documentation
@@ -25,6 +26,7 @@ ValidationError.__module__ = 'datapackage.exceptions'
 CastError.__module__ = 'datapackage.exceptions'
 IntegrityError.__module__ = 'datapackage.exceptions'
 RelationError.__module__ = 'datapackage.exceptions'
+UnresolvedFKError.__module__ = 'datapackage.exceptions'
 StorageError.__module__ = 'datapackage.exceptions'
 
 
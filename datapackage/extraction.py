@@ -0,0 +1,304 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import six
+import time
+import shutil
+import hashlib
+import tempfile
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from . import config
+
+
+# Module API
+
+class ExtractionCache(object):
+    """Persistent on-disk cache of extracted zip packages
+
+    An archive is extracted once per key and the extracted tree is reused
+    by later opens. The key is based on path, size and modification time
+    for archives on disk and on a content hash for other sources.
+    Entries are extracted into a temporary directory and then atomically
+    renamed so concurrent processes never see partial trees. When the cache
+    is bigger than `max_size` the least recently used entries are evicted
+    except for the ones leased by packages (in any process) using them.
+    Extracted trees are shared so they must not be modified.
+
+    # Arguments
+        directory (str): cache directory
+        max_size (int): cache size limit in bytes (`config.EXTRACTION_CACHE_SIZE` by default)
+
+    """
+
+    # Public
+
+    def __init__(self, directory, max_size=None):
+        self.__directory = directory
+        self.__max_size = config.EXTRACTION_CACHE_SIZE if max_size is None else max_size
+
+    @property
+    def directory(self):
+        """Cache directory
+
+        # Returns
+            str: cache directory
+
+        """
+        return self.__directory
+
+    def get_key(self, source):
+        """Get cache key for a zip source
+
+        # Arguments
+            source (str/filelike): zip file path or seekable file-like object
+
+        # Returns
+            str: cache key
+
+        """
+        hash = hashlib.sha256()
+        if isinstance(source, six.string_types):
+            stat = os.stat(source)
+            contents = '%s:%s:%s' % (os.path.abspath(source), stat.st_size, stat.st_mtime)
+            hash.update(('path:%s' % contents).encode('utf-8'))
+        else:
+            source.seek(0)
+            hash.update(b'content:')
+            for chunk in iter(lambda: source.read(_CHUNK_SIZE), b''):
+                hash.update(chunk)
+            source.seek(0)
+        return hash.hexdigest()
+
+    def extract(self, the_zip, key):
+        """Get directory the zip is extracted to (extracting it on a miss)
+
+        # Arguments
+            the_zip (zipfile.ZipFile): opened zip archive
+            key (str): cache key (see `get_key`)
+
+        # Returns
+            str: path to the extracted tree
+
+        """
+
+        # Hit
+        path = os.path.join(self.__directory, key)
+        if os.path.isdir(path):
+            _touch_path(path)
+            return path
+
+        # Miss
+        self.__make_directory()
+        temp_path = tempfile.mkdtemp(dir=self.__directory, suffix=_TEMP_SUFFIX)
+        try:
+            the_zip.extractall(temp_path)
+            os.rename(temp_path, path)
+        except OSError:
+            # Another process has extracted the same archive
+            shutil.rmtree(temp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        except Exception:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+        self.__evict_entries(keep=path)
+
+        return path
+
+    def lease(self, key):
+        """Protect entry from eviction until the lease is released
+
+        Take a lease before `extract` to use the extracted tree safely.
+
+        # Arguments
+            key (str): cache key (see `get_key`)
+
+        # Returns
+            ExtractionLease: lease to release when the tree is not used anymore
+
+        """
+        self.__make_directory()
+        return ExtractionLease(os.path.join(self.__directory, key))
+
+    def clear(self):
+        """Remove all cached entries (except for leased ones)
+        """
+        for path, _ in self.__list_entries():
+            _remove_entry(path)
+
+    # Private
+
+    def __make_directory(self):
+        if not os.path.isdir(self.__directory):
+            try:
+                os.makedirs(self.__directory)
+            except OSError:
+                if not os.path.isdir(self.__directory):
+                    raise
+
+    def __list_entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.__directory)
+        except OSError:
+            names = []
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.__directory, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if name.endswith(_LOCK_SUFFIX):
+                continue
+            # Partial trees are only listed if they're abandoned
+            if name.endswith(_TEMP_SUFFIX) and now - mtime < _TEMP_TTL:
+                continue
+            entries.append((path, mtime))
+        return entries
+
+    def __evict_entries(self, keep):
+        entries = sorted(self.__list_entries(), key=lambda entry: entry[1])
+        sizes = dict((path, _get_tree_size(path)) for path, _ in entries)
+        size = sum(sizes.values())
+        for path, _ in entries:
+            if size <= self.__max_size:
+                break
+            if path == keep:
+                continue
+            if _remove_entry(path):
+                size -= sizes[path]
+
+
+class ExtractionLease(object):
+    """Lease protecting an extracted tree from eviction (see `ExtractionCache.lease`)
+
+    It's a shared lock on the entry's lock file, so it's released by the
+    system if the process dies. On systems without `fcntl` the lock file
+    is touched instead and recently touched entries are not evicted.
+
+    # Arguments
+        path (str): path to the extracted tree
+
+    """
+
+    # Public
+
+    def __init__(self, path):
+        self.__file = _lock_entry(path, exclusive=False)
+
+    def release(self):
+        """Release the lease (it can be called many times)
+        """
+        if self.__file is not None:
+            _unlock_entry(self.__file)
+            self.__file = None
+
+
+# Internal
+
+_CHUNK_SIZE = 64 * 1024
+_TEMP_SUFFIX = '.tmp'
+_TEMP_TTL = 24 * 3600
+_LOCK_SUFFIX = '.lock'
+
+
+def _lock_entry(path, exclusive):
+    """Lock entry returning the lock file or None if it's in use (for exclusive locks)
+
+    Shared locks wait for exclusive ones, exclusive locks don't wait.
+    """
+    lock_path = path + _LOCK_SUFFIX
+
+    # No locking available
+    if fcntl is None:
+        if exclusive:
+            try:
+                if time.time() - os.stat(lock_path).st_mtime < _TEMP_TTL:
+                    return None
+            except OSError:
+                pass
+        file = io.open(lock_path, 'ab')
+        if not exclusive:
+            _touch_path(lock_path)
+        return file
+
+    while True:
+        file = io.open(lock_path, 'ab')
+
+        # Lock
+        try:
+            if exclusive:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                fcntl.flock(file.fileno(), fcntl.LOCK_SH)
+        except (IOError, OSError):
+            file.close()
+            return None
+
+        # The lock file could have been removed by eviction meanwhile
+        try:
+            if os.path.samestat(os.fstat(file.fileno()), os.stat(lock_path)):
+                return file
+        except OSError:
+            pass
+        file.close()
+
+
+def _unlock_entry(file):
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    file.close()
+
+
+def _remove_entry(path):
+    """Remove entry if it's not leased returning True on success
+    """
+    file = _lock_entry(path, exclusive=True)
+    if file is None:
+        return False
+    try:
+        _remove_tree(path)
+        try:
+            os.remove(path + _LOCK_SUFFIX)
+        except OSError:
+            pass
+    finally:
+        _unlock_entry(file)
+    return True
+
+
+def _touch_path(path):
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _get_tree_size(path):
+    size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+
+
+def _remove_tree(path):
+    """Remove tree moving it away first so it's never seen partially removed
+    """
+    temp_path = '%s-%s%s' % (path, os.getpid(), _TEMP_SUFFIX)
+    try:
+        os.rename(path, temp_path)
+    except OSError:
+        return
+    shutil.rmtree(temp_path, ignore_errors=True)
@@ -77,7 +77,7 @@ class Group(object):
                 break
         return rows
 
-    def check_relations(self):
+    def check_relations(self, memory_limit=None):
         """Check group's relations
 
         The same as `resource.check_relations` but without the optional
@@ -85,9 +85,13 @@ class Group(object):
         whole group at once otpimizing the process by creating the foreign_key_values
         hashmap only once before testing the set of resources.
 
+        # Arguments
+            memory_limit (int): see `resource.check_relations`
+
         """
         # opti relations should ne loaded only once for the group
-        foreign_keys_values = self.__resources[0].get_foreign_keys_values()
+        foreign_keys_values = self.__resources[0].get_foreign_keys_values(
+            memory_limit=memory_limit, resolve=False)
 
         # alternative to check_relations from tableschema-py
         for resource in self.__resources:
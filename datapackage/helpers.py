@@ -10,9 +10,14 @@ import re
 import six
 import json
 import requests
+import threading
 import jsonpointer
+from copy import deepcopy
+from multiprocessing.pool import ThreadPool
+from requests.packages.urllib3.util.retry import Retry
 from . import config
 from . import exceptions
+from .httpcache import HTTPCache
 
 
 # Get descriptor base path
@@ -36,9 +41,91 @@ def get_descriptor_base_path(descriptor):
     return base_path
 
 
+# HTTP session
+
+def get_http_session(http_session=None):
+    """Return `http_session` if given or the shared HTTP session.
+
+    The shared session is created on the first call
+    using `create_http_session` with the defaults from `config`.
+    """
+    global _http_session
+    if http_session is not None:
+        return http_session
+    with _http_session_lock:
+        if _http_session is None:
+            _http_session = create_http_session()
+        return _http_session
+
+
+def create_http_session(pool_size=None, timeout=None, retries=None, cache=None):
+    """Create HTTP session with connection pooling, timeouts and retries.
+
+    Arguments default to `config.HTTP_POOL_SIZE`, `config.HTTP_TIMEOUT`
+    and `config.HTTP_RETRIES`. The timeout is used for requests without
+    their own timeout. Connection errors and 502/503/504 responses are
+    retried with exponential backoff.
+
+    Not streamed GET requests are cached on disk if `cache` (`HTTPCache`)
+    is given or `config.HTTP_CACHE_DIR` is set.
+    """
+    pool_size = config.HTTP_POOL_SIZE if pool_size is None else pool_size
+    timeout = config.HTTP_TIMEOUT if timeout is None else timeout
+    retries = config.HTTP_RETRIES if retries is None else retries
+    if cache is None and config.HTTP_CACHE_DIR:
+        cache = HTTPCache(config.HTTP_CACHE_DIR)
+    adapter = _HTTPAdapter(
+        timeout=timeout,
+        cache=cache,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=_create_retry(retries))
+    http_session = requests.Session()
+    http_session.headers.update(config.HTTP_HEADERS)
+    http_session.mount('http://', adapter)
+    http_session.mount('https://', adapter)
+    return http_session
+
+
+def _create_retry(retries):
+    options = {
+        'total': retries,
+        'backoff_factor': config.HTTP_RETRY_BACKOFF,
+        'status_forcelist': [502, 503, 504],
+    }
+    try:
+        return Retry(raise_on_status=False, **options)
+    except TypeError:
+        # urllib3<1.15 has no raise_on_status (exhausted retries raise RetryError)
+        return Retry(**options)
+
+
+class _HTTPAdapter(requests.adapters.HTTPAdapter):
+
+    # Pickled attributes
+    __attrs__ = requests.adapters.HTTPAdapter.__attrs__ + ['timeout', 'cache']
+
+    def __init__(self, timeout=None, cache=None, **kwargs):
+        self.timeout = timeout
+        self.cache = cache
+        super(_HTTPAdapter, self).__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        send = super(_HTTPAdapter, self).send
+        if self.cache is not None and request.method == 'GET' and not kwargs.get('stream'):
+            return self.cache.send(request, lambda request: send(request, **kwargs))
+        return send(request, **kwargs)
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
 # Retrieve descriptor
 
-def retrieve_descriptor(descriptor):
+def retrieve_descriptor(descriptor, http_session=None):
     """Retrieve descriptor.
     """
     the_descriptor = descriptor
@@ -52,7 +139,7 @@ def retrieve_descriptor(descriptor):
                 with open(the_descriptor, 'r') as f:
                     the_descriptor = json.load(f)
             else:
-                req = requests.get(the_descriptor)
+                req = get_http_session(http_session).get(the_descriptor)
                 req.raise_for_status()
                 # Force UTF8 encoding for 'text/plain' sources
                 req.encoding = 'utf8'
@@ -80,18 +167,51 @@ def retrieve_descriptor(descriptor):
 
 # Dereference descriptor
 
-def dereference_package_descriptor(descriptor, base_path):
+def dereference_package_descriptor(descriptor, base_path, http_session=None, archive=None):
     """Dereference data package descriptor (IN-PLACE FOR NOW).
+
+    Unique remote URIs are fetched concurrently (see `config.DEREFERENCE_WORKERS`)
+    and every resource gets its own copy of the fetched JSON.
+    Local URIs are read from `archive` members if the package is zipped.
     """
-    for resource in descriptor.get('resources', []):
-        dereference_resource_descriptor(resource, base_path, descriptor)
+    resources = descriptor.get('resources', [])
+
+    # Prefetch remote URIs
+    urls = []
+    for resource in resources:
+        if isinstance(resource, dict):
+            for property in _DEREFERENCE_PROPERTIES:
+                url = _get_remote_uri(resource.get(property), base_path)
+                if url is not None and url not in urls:
+                    urls.append(url)
+    remote_values = None
+    load = lambda url: _load_remote_json(url, http_session)
+    if len(urls) == 1:
+        remote_values = {urls[0]: load(urls[0])}
+    elif len(urls) > 1:
+        pool = ThreadPool(min(config.DEREFERENCE_WORKERS, len(urls)))
+        try:
+            remote_values = dict(zip(urls, pool.map(load, urls)))
+        finally:
+            pool.close()
+            pool.join()
+
+    # Dereference resources
+    for resource in resources:
+        dereference_resource_descriptor(resource, base_path, descriptor,
+            http_session=http_session, remote_values=remote_values, archive=archive)
+
     return descriptor
 
 
-def dereference_resource_descriptor(descriptor, base_path, base_descriptor=None):
+def dereference_resource_descriptor(descriptor, base_path, base_descriptor=None,
+                                    http_session=None, remote_values=None, archive=None):
     """Dereference resource descriptor (IN-PLACE FOR NOW).
+
+    `remote_values` maps prefetched remote URIs to loaded JSON or errors.
+    Local URIs are read from `archive` members if the resource is zipped.
     """
-    PROPERTIES = ['schema', 'dialect']
+    PROPERTIES = _DEREFERENCE_PROPERTIES
     if base_descriptor is None:
         base_descriptor = descriptor
     for property in PROPERTIES:
@@ -114,14 +234,19 @@ def dereference_resource_descriptor(descriptor, base_path, base_descriptor=None)
                 )
 
         # URI -> Remote
-        elif base_path.startswith('http') or value.startswith('http'):
+        elif _get_remote_uri(value, base_path) is not None:
             try:
-                fullpath = value
-                if not value.startswith('http'):
-                    fullpath = os.path.join(base_path, value)
-                response = requests.get(fullpath)
-                response.raise_for_status()
-                descriptor[property] = response.json()
+                fullpath = _get_remote_uri(value, base_path)
+                if remote_values is not None and fullpath in remote_values:
+                    result, error = remote_values[fullpath]
+                    if error is not None:
+                        raise error
+                    descriptor[property] = deepcopy(result)
+                else:
+                    result, error = _load_remote_json(fullpath, http_session)
+                    if error is not None:
+                        raise error
+                    descriptor[property] = result
             except Exception as error:
                 message = 'Not resolved Remote URI "%s" for resource.%s' % (value, property)
                 six.raise_from(
@@ -141,8 +266,12 @@ def dereference_resource_descriptor(descriptor, base_path, base_descriptor=None)
                     'for resource.%s' % (value, property))
             fullpath = os.path.join(base_path, value)
             try:
-                with io.open(fullpath, encoding='utf-8') as file:
-                    descriptor[property] = json.load(file)
+                member = archive.get_member(fullpath) if archive is not None else None
+                if member is not None:
+                    descriptor[property] = json.loads(archive.read(member).decode('utf-8'))
+                else:
+                    with io.open(fullpath, encoding='utf-8') as file:
+                        descriptor[property] = json.load(file)
             except Exception as error:
                 message = 'Not resolved Local URI "%s" for resource.%s' % (value, property)
                 six.raise_from(
@@ -153,6 +282,52 @@ def dereference_resource_descriptor(descriptor, base_path, base_descriptor=None)
     return descriptor
 
 
+_DEREFERENCE_PROPERTIES = ['schema', 'dialect']
+_HASH_ALGORITHMS = ['md5', 'sha1', 'sha256', 'sha512']
+
+
+def _get_remote_uri(value, base_path):
+    """Return full remote URI for schema/dialect value or None if it's not remote
+    """
+    if not isinstance(value, six.string_types) or value.startswith('#'):
+        return None
+    if value.startswith('http'):
+        return value
+    if base_path and base_path.startswith('http'):
+        return os.path.join(base_path, value)
+    return None
+
+
+def _load_remote_json(url, http_session=None):
+    """Load remote JSON returning (result, error)
+    """
+    try:
+        response = get_http_session(http_session).get(url)
+        response.raise_for_status()
+        return (response.json(), None)
+    except Exception as error:
+        return (None, error)
+
+
+# Copy descriptor
+
+def copy_descriptor(descriptor):
+    """Copy package/resource descriptor sharing resources' inline data.
+
+    Inline data is never modified in-place internally so it's shared between
+    copies to make copying independent of the data size. It's only for
+    descriptors owned by the library: callers' descriptors are copied fully.
+    """
+    memo = {}
+    items = [descriptor]
+    if isinstance(descriptor.get('resources'), list):
+        items.extend(descriptor['resources'])
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get('data'), (list, dict)):
+            memo[id(item['data'])] = item['data']
+    return deepcopy(descriptor, memo)
+
+
 # Expand descriptor
 
 def expand_package_descriptor(descriptor):
@@ -222,3 +397,13 @@ def extract_sha256_hash(hash):
     if hash and hash.startswith(prefix):
         return hash.replace(prefix, '')
     return None
+
+
+def extract_hash(hash):
+    """Extract (algorithm, hash) of a supported prefixed hash or return None
+    """
+    if hash and ':' in hash:
+        algorithm, value = hash.split(':', 1)
+        if algorithm in _HASH_ALGORITHMS:
+            return (algorithm, value)
+    return None
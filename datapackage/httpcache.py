@@ -0,0 +1,217 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from . import config
+
+
+# Module API
+
+class HTTPCache(object):
+    """Persistent on-disk cache for HTTP GET responses
+
+    It's used by HTTP sessions created by `helpers.create_http_session`
+    for not streamed requests (descriptors, schemas, dialects and profiles).
+    A fresh entry (younger than `ttl`) is served without network access.
+    A stale one is revalidated using `ETag`/`Last-Modified` headers.
+    When the cache is bigger than `max_size` the least recently used
+    entries are evicted. Requests with credentials (authorization or cookie
+    headers) bypass the cache and responses with `Cache-Control: no-store`
+    or `Cache-Control: private` are not cached.
+
+    # Arguments
+        directory (str): cache directory
+        ttl (int): seconds an entry is used without revalidation (`config.HTTP_CACHE_TTL` by default)
+        max_size (int): cache size limit in bytes (`config.HTTP_CACHE_SIZE` by default)
+
+    """
+
+    # Public
+
+    def __init__(self, directory, ttl=None, max_size=None):
+        self.__directory = directory
+        self.__ttl = config.HTTP_CACHE_TTL if ttl is None else ttl
+        self.__max_size = config.HTTP_CACHE_SIZE if max_size is None else max_size
+        self.__lock = threading.Lock()
+
+    @property
+    def directory(self):
+        """Cache directory
+
+        # Returns
+            str: cache directory
+
+        """
+        return self.__directory
+
+    def send(self, request, send):
+        """Send prepared GET `request` using the cache
+
+        # Arguments
+            request (requests.PreparedRequest): request to send
+            send (func): function sending a request to the network
+
+        # Returns
+            requests.Response: response (maybe from the cache)
+
+        """
+
+        # Credentials
+        if any(request.headers.get(name) for name in _CREDENTIAL_HEADERS):
+            return send(request)
+
+        # Fresh entry
+        path = self.__get_path(request.url)
+        entry = self.__read_entry(path)
+        if entry is not None and time.time() - entry[0]['time'] < self.__ttl:
+            self.__touch_entry(path)
+            return _build_response(request, entry[0], entry[1])
+
+        # Revalidate entry
+        if entry is not None:
+            headers = entry[0]['headers']
+            if headers.get('ETag'):
+                request.headers['If-None-Match'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+        response = send(request)
+        if entry is not None and response.status_code == 304:
+            entry[0]['time'] = time.time()
+            self.__write_entry(path, entry[0], entry[1])
+            return _build_response(request, entry[0], entry[1])
+
+        # Store entry
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        directives = set(item.split('=')[0].strip() for item in cache_control.split(','))
+        if response.status_code == 200 and not directives & set(['no-store', 'private']):
+            meta = {
+                'url': request.url,
+                'time': time.time(),
+                'headers': dict((key, response.headers[key])
+                    for key in _STORED_HEADERS if key in response.headers),
+            }
+            self.__write_entry(path, meta, response.content)
+
+        return response
+
+    def clear(self):
+        """Remove all cached entries
+        """
+        with self.__lock:
+            for path, _, _ in self.__list_entries():
+                _remove_file(path)
+
+    # Private
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_HTTPCache__lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    def __get_path(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.__directory, '%s.entry' % key)
+
+    def __read_entry(self, path):
+        try:
+            with io.open(path, 'rb') as file:
+                meta = json.loads(file.readline().decode('utf-8'))
+                content = file.read()
+        except (IOError, OSError, ValueError):
+            return None
+        return (meta, content)
+
+    def __write_entry(self, path, meta, content):
+        try:
+            if not os.path.isdir(self.__directory):
+                os.makedirs(self.__directory)
+            handle, temp_path = tempfile.mkstemp(dir=self.__directory, suffix='.tmp')
+            with io.open(handle, 'wb') as file:
+                file.write(json.dumps(meta).encode('utf-8'))
+                file.write(b'\n')
+                file.write(content)
+            _replace_file(temp_path, path)
+        except (IOError, OSError):
+            return
+        self.__evict_entries()
+
+    def __touch_entry(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def __list_entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.__directory)
+        except OSError:
+            names = []
+        for name in names:
+            if name.endswith('.entry'):
+                path = os.path.join(self.__directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def __evict_entries(self):
+        with self.__lock:
+            entries = sorted(self.__list_entries(), key=lambda entry: entry[1])
+            size = sum(entry[2] for entry in entries)
+            for path, _, entry_size in entries:
+                if size <= self.__max_size:
+                    break
+                _remove_file(path)
+                size -= entry_size
+
+
+# Internal
+
+_STORED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified']
+_CREDENTIAL_HEADERS = ['Authorization', 'Proxy-Authorization', 'Cookie']
+
+
+def _build_response(request, meta, content):
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.url = request.url
+    response.request = request
+    response.headers = CaseInsensitiveDict(meta['headers'])
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = content
+    return response
+
+
+def _replace_file(source, target):
+    try:
+        os.rename(source, target)
+    except OSError:
+        # Windows doesn't replace existent files on rename
+        _remove_file(target)
+        os.rename(source, target)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
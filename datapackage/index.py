@@ -0,0 +1,482 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import six
+import sys
+import sqlite3
+import decimal
+import threading
+from collections import OrderedDict
+from six.moves import cPickle as pickle
+from six.moves.collections_abc import Mapping
+from . import exceptions
+from . import config
+
+
+# Module API
+
+class ForeignKeyIndex(Mapping):
+    """Compact index of referenced keys for foreign key checks
+
+    It's a drop-in replacement for the innermost level of tableschema's
+    `foreign_keys_values` map (`{(value1, value2)\\: {one_keyedrow}}`).
+    Only key values are stored (single field keys are stored unwrapped)
+    and, if `headers` are provided, the first referenced row for every key
+    as a tuple. So memory scales with key cardinality and width instead
+    of the referenced table size. Without `headers` a found key resolves
+    to `True` so rows are checked but not resolved.
+
+    If the approximate size of the index exceeds `memory_limit` it's moved
+    to a temporary SQLite database on disk. Keys are written in batches
+    and probed using the database's primary key index.
+
+    # Arguments
+        fields (str[]): referenced fields
+        headers (str[]): headers of the stored rows (keys only if not provided)
+        memory_limit (int):
+            size in bytes to switch to disk
+            (`config.RELATIONS_MEMORY_LIMIT` by default, `None` is unlimited)
+
+    """
+
+    # Public
+
+    def __init__(self, fields, headers=None, memory_limit=None):
+        if memory_limit is None:
+            memory_limit = config.RELATIONS_MEMORY_LIMIT
+        self.__fields = tuple(fields)
+        self.__single = len(self.__fields) == 1
+        self.__headers = tuple(headers) if headers is not None else None
+        self.__memory_limit = memory_limit
+        self.__store = _MemoryStore(resolves=self.__headers is not None)
+
+    @property
+    def fields(self):
+        """Referenced fields
+
+        # Returns
+            tuple: fields
+
+        """
+        return self.__fields
+
+    @property
+    def resolves(self):
+        """Whether rows are stored to resolve keys
+
+        # Returns
+            bool: True if keys resolve to keyed rows
+
+        """
+        return self.__headers is not None
+
+    @property
+    def size(self):
+        """Approximate size of the index in memory
+
+        # Returns
+            int: size in bytes (0 if the index is on disk)
+
+        """
+        return 0 if self.on_disk else self.__store.size
+
+    @property
+    def on_disk(self):
+        """Whether the index has been moved to disk
+
+        # Returns
+            bool: True if the index is stored in SQLite
+
+        """
+        return isinstance(self.__store, _SQLiteStore)
+
+    def add(self, key, row=None):
+        """Add key (keeping the first row for the key)
+
+        # Arguments
+            key (tuple): key values
+            row (list): referenced row (used only if the index resolves keys)
+
+        """
+        if self.__headers is not None:
+            row = tuple(row)
+        else:
+            row = None
+        self.__store.add(self.__pack(key), row)
+        if self.__memory_limit is not None and not self.on_disk:
+            if self.__store.size > self.__memory_limit:
+                store = _SQLiteStore(resolves=self.__headers is not None)
+                store.update(self.__store)
+                self.__store = store
+
+    def close(self):
+        """Release the index storage (it's empty after closing)
+        """
+        self.__store.close()
+        self.__store = _MemoryStore(resolves=self.__headers is not None)
+
+    def __contains__(self, key):
+        try:
+            return self.__store.contains(self.__pack(key))
+        except TypeError:
+            return False
+
+    def __getitem__(self, key):
+        try:
+            row = self.__store.get(self.__pack(key))
+        except TypeError:
+            raise KeyError(key)
+        if self.__headers is None:
+            return True
+        return dict(zip(self.__headers, row))
+
+    def __iter__(self):
+        for key in self.__store:
+            yield (key,) if self.__single else key
+
+    def __len__(self):
+        return len(self.__store)
+
+    # Private
+
+    def __pack(self, key):
+        return key[0] if self.__single else tuple(key)
+
+
+class ForeignKeyIndexCache(object):
+    """LRU cache of foreign key indexes shared by resources of a package
+
+    Indexes are cached by (referenced resource name, fields, resolve) so
+    every resource referencing the same fields uses the same index.
+    When the total size of indexes in memory exceeds `max_size` the least
+    recently used ones are evicted (they're freed when no longer in use).
+
+    # Arguments
+        max_size (int): size limit in bytes (`config.RELATIONS_CACHE_SIZE` by default)
+
+    """
+
+    # Public
+
+    def __init__(self, max_size=None):
+        self.__max_size = config.RELATIONS_CACHE_SIZE if max_size is None else max_size
+        self.__indexes = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """Get index marking it as recently used
+
+        # Arguments
+            key (tuple): (resource name, fields, resolve)
+
+        # Returns
+            ForeignKeyIndex/None: index or None if it's not cached
+
+        """
+        with self.__lock:
+            index = self.__indexes.pop(key, None)
+            if index is not None:
+                self.__indexes[key] = index
+            return index
+
+    def set(self, key, index):
+        """Cache index evicting least recently used ones if needed
+
+        # Arguments
+            key (tuple): (resource name, fields, resolve)
+            index (ForeignKeyIndex): index
+
+        """
+        with self.__lock:
+            self.__indexes.pop(key, None)
+            self.__indexes[key] = index
+            size = sum(index.size for index in self.__indexes.values())
+            for evicted_key in list(self.__indexes):
+                if size <= self.__max_size or evicted_key == key:
+                    break
+                size -= self.__indexes.pop(evicted_key).size
+
+    def clear(self):
+        """Remove all cached indexes
+        """
+        with self.__lock:
+            self.__indexes.clear()
+
+    def __contains__(self, key):
+        return key in self.__indexes
+
+    def __len__(self):
+        return len(self.__indexes)
+
+
+def index_foreign_keys(foreign_keys, get_resource, resolve=True, memory_limit=None,
+                       cache=None, get_cache_name=None):
+    """Create `foreign_keys_values` map for foreign keys using compact indexes
+
+    Every referenced resource is read once for all its foreign keys
+    projecting the referenced fields (and rows if `resolve`).
+    Indexes found in `cache` are reused and new ones are added to it.
+
+    # Arguments
+        foreign_keys (dict[]): schema foreign keys
+        get_resource (func): returns referenced resource by name or None
+        resolve (bool): store referenced rows to resolve keys
+        memory_limit (int): size in bytes for an index to switch to disk (see `ForeignKeyIndex`)
+        cache (ForeignKeyIndexCache): cache of indexes
+        get_cache_name (func):
+            returns the name referenced resource is cached by
+            (the reference name by default, None not to cache)
+
+    # Raises
+        RelationError: raises if referenced fields are not in the resource
+
+    # Returns
+        dict: `{resource\\: {(field1, field2)\\: ForeignKeyIndex}}`
+
+    """
+
+    # Group foreign keys by resource
+    references = {}
+    for fk in foreign_keys:
+        name = fk['reference']['resource']
+        fields = tuple(fk['reference']['fields'])
+        references.setdefault(name, [])
+        if fields not in references[name]:
+            references[name].append(fields)
+
+    # Index resources
+    foreign_keys_values = {}
+    for name, fields_list in references.items():
+        foreign_keys_values[name] = {}
+
+        # Get cached (resolving indexes can be used for checks only as well)
+        cache_name = get_cache_name(name) if get_cache_name else name
+        if cache is not None and cache_name is not None:
+            for fields in list(fields_list):
+                index = cache.get((cache_name, fields, resolve))
+                if index is None and not resolve:
+                    index = cache.get((cache_name, fields, True))
+                if index is not None:
+                    foreign_keys_values[name][fields] = index
+                    fields_list.remove(fields)
+            if not fields_list:
+                continue
+
+        # Create new
+        resource = get_resource(name)
+        if resource is not None and resource.tabular:
+            indexes = []
+            # Only key values are cast if rows are not resolved
+            for row_number, headers, row in resource.iter(extended=True, cast=resolve):
+                if not indexes:
+                    for fields in fields_list:
+                        index = ForeignKeyIndex(fields,
+                            headers=headers if resolve else None, memory_limit=memory_limit)
+                        get_key = create_key_getter(fields, headers,
+                            schema=None if resolve else resource.schema, resource=name)
+                        foreign_keys_values[name][fields] = index
+                        indexes.append((index, get_key))
+                for index, get_key in indexes:
+                    index.add(get_key(row), row)
+        for fields in fields_list:
+            index = foreign_keys_values[name].setdefault(fields, ForeignKeyIndex(fields))
+            if cache is not None and cache_name is not None:
+                cache.set((cache_name, fields, resolve), index)
+
+    return foreign_keys_values
+
+
+def create_key_getter(fields, headers, schema=None, resource=''):
+    """Create function getting key values from a row
+
+    # Arguments
+        fields (str[]): key fields
+        headers (str[]): row headers
+        schema (tableschema.Schema): schema to cast raw key values with (if provided)
+        resource (str): resource name for error messages
+
+    # Raises
+        RelationError: raises if key fields are not in the headers
+
+    # Returns
+        func: returns key tuple for a row
+
+    """
+    missing = [field for field in fields if field not in headers]
+    if missing:
+        message = 'Foreign key fields %s not found in resource "%s"'
+        raise exceptions.RelationError(message % (missing, resource))
+    getters = []
+    for field in fields:
+        position = headers.index(field)
+        cast = None
+        if schema is not None and schema.get_field(field) is not None:
+            cast = schema.get_field(field).cast_value
+        getters.append((position, cast))
+
+    def get_key(row):
+        key = []
+        for position, cast in getters:
+            value = row[position] if position < len(row) else None
+            key.append(cast(value) if cast is not None else value)
+        return tuple(key)
+
+    return get_key
+
+
+# Internal
+
+_BATCH_SIZE = 10000
+
+
+class _MemoryStore(object):
+    """In-memory keys (with rows) tracking their approximate size
+    """
+
+    # Public
+
+    def __init__(self, resolves):
+        self.__items = {} if resolves else set()
+        self.__resolves = resolves
+        self.size = 0
+
+    def add(self, key, row):
+        if key in self.__items:
+            return
+        if self.__resolves:
+            self.__items[key] = row
+            self.size += _get_size(row)
+        else:
+            self.__items.add(key)
+        self.size += _get_size(key)
+
+    def contains(self, key):
+        return key in self.__items
+
+    def get(self, key):
+        if key not in self.__items:
+            raise KeyError(key)
+        return self.__items[key] if self.__resolves else None
+
+    def items(self):
+        for key in self.__items:
+            yield (key, self.__items[key] if self.__resolves else None)
+
+    def close(self):
+        self.__items = {} if self.__resolves else set()
+        self.size = 0
+
+    def __iter__(self):
+        return iter(self.__items)
+
+    def __len__(self):
+        return len(self.__items)
+
+
+class _SQLiteStore(object):
+    """Keys (with rows) in a private temporary SQLite database on disk
+
+    Keys are serialized so equal values of different numeric types are
+    found as in Python sets/dicts. Insertions are buffered into batches.
+    """
+
+    # Public
+
+    def __init__(self, resolves):
+        # An empty name is a temporary database removed on closing
+        self.__connection = sqlite3.connect('', check_same_thread=False)
+        self.__connection.execute(
+            'CREATE TABLE keys (key TEXT PRIMARY KEY, value BLOB, row BLOB)')
+        self.__resolves = resolves
+        self.__pending = {}
+
+    def add(self, key, row):
+        serialized = _serialize_key(key)
+        if serialized not in self.__pending:
+            self.__pending[serialized] = (key, row)
+            if len(self.__pending) >= _BATCH_SIZE:
+                self.__flush()
+
+    def update(self, store):
+        for key, row in store.items():
+            self.add(key, row)
+        self.__flush()
+
+    def contains(self, key):
+        return self.__select(key) is not None
+
+    def get(self, key):
+        result = self.__select(key)
+        if result is None:
+            raise KeyError(key)
+        return pickle.loads(bytes(result[0])) if self.__resolves else None
+
+    def close(self):
+        self.__pending = {}
+        self.__connection.close()
+
+    def __iter__(self):
+        self.__flush()
+        for value, in self.__connection.execute('SELECT value FROM keys'):
+            yield pickle.loads(bytes(value))
+
+    def __len__(self):
+        self.__flush()
+        return self.__connection.execute('SELECT COUNT(*) FROM keys').fetchone()[0]
+
+    # Private
+
+    def __select(self, key):
+        self.__flush()
+        query = 'SELECT row FROM keys WHERE key = ?'
+        return self.__connection.execute(query, (_serialize_key(key),)).fetchone()
+
+    def __flush(self):
+        if not self.__pending:
+            return
+        records = []
+        for serialized, (key, row) in self.__pending.items():
+            value = sqlite3.Binary(pickle.dumps(key, 2))
+            row = sqlite3.Binary(pickle.dumps(row, 2)) if self.__resolves else None
+            records.append((serialized, value, row))
+        # The first row for a key is kept like in memory
+        query = 'INSERT OR IGNORE INTO keys (key, value, row) VALUES (?, ?, ?)'
+        with self.__connection:
+            self.__connection.executemany(query, records)
+        self.__pending = {}
+
+
+def _serialize_key(key):
+    """Serialize key so equal keys (as in Python) are serialized equally
+    """
+    if isinstance(key, tuple):
+        parts = [_serialize_value(value) for value in key]
+        return 't' + ''.join('%s%s' % (len(part), part) for part in parts)
+    return _serialize_value(key)
+
+
+def _serialize_value(value):
+    # Unhashable values can't be keys in memory either
+    hash(value)
+    if isinstance(value, six.string_types):
+        return 's:%s' % value
+    # Booleans are serialized as numbers (True == 1 as in Python)
+    if isinstance(value, (six.integer_types, float, decimal.Decimal)):
+        number = decimal.Decimal(value)
+        if not number.is_finite():
+            return 'n:%s' % number
+        # Integers are exact, others are normalized without rounding
+        if number == number.to_integral_value():
+            return 'n:%d' % int(number)
+        context = decimal.Context(prec=len(number.as_tuple().digits))
+        return 'n:%s' % number.normalize(context)
+    return 'r:%s:%r' % (type(value).__name__, value)
+
+
+def _get_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
@@ -9,18 +9,20 @@ from .package import Package
 
 # Module API
 
-def infer(pattern, base_path=None):
+def infer(pattern, base_path=None, integrity=False):
     """Infer a data package descriptor.
 
     > Argument `pattern` works only for local files
 
     # Arguments
         pattern (str): glob file pattern
+        base_path (str): base path for the pattern
+        integrity (bool): infer resources' `bytes` and `hash`
 
     # Returns
         dict: returns data package descriptor
 
     """
     package = Package({}, base_path=base_path)
-    descriptor = package.infer(pattern)
+    descriptor = package.infer(pattern, integrity=integrity)
     return descriptor
@@ -10,14 +10,23 @@ import six
 import json
 import copy
 import glob
+import sys
 import shutil
+import hashlib
 import zipfile
+import posixpath
 import requests
 import warnings
 import tempfile
 from copy import deepcopy
 from tableschema import Storage
+from six.moves.collections_abc import Sequence
+from six.moves.urllib.parse import urlparse
+from multiprocessing.pool import ThreadPool
 from .resource import Resource
+from .archive import Archive
+from .extraction import ExtractionCache
+from .index import ForeignKeyIndexCache
 from .profile import Profile
 from .group import Group
 from . import exceptions
@@ -36,11 +45,27 @@ class Package(object):
         strict (bool): strict flag to alter validation behavior.
             Setting it to `True` leads to throwing errors
             on any operation with invalid descriptor
+            (validation stops on the first error)
         unsafe (bool):
             if `True` unsafe paths will be allowed. For more inforamtion
             https\\://specs.frictionlessdata.io/data-resource/#data-location.
             Default to `False`
         storage (str/tableschema.Storage): storage name like `sql` or storage instance
+        lazy (bool):
+            if `True` resources will be instantiated (and validated) on first access.
+            The package descriptor is still validated on creation. Default to `False`
+        http_session (requests.Session):
+            HTTP session used for all remote files of the package and its resources.
+            Default to the shared session (see `helpers.get_http_session`)
+        zip_native (bool):
+            if `True` a zipped package is read in place without extraction.
+            Its resources read archive members directly (stored members are
+            memory-mapped). Use `package.close()` or the package as a context
+            manager to release the archive. Default to `False`
+        extraction_cache (ExtractionCache):
+            cache reusing extracted trees of zipped packages opened repeatedly.
+            The tree is protected from eviction until the package is closed.
+            Default to a cache in `config.EXTRACTION_CACHE_DIR` if it's set
         options (dict): storage options to use for storage creation
 
     # Raises
@@ -51,6 +76,7 @@ class Package(object):
     # Public
 
     def __init__(self, descriptor=None, base_path=None, strict=False, unsafe=False, storage=None,
+                 lazy=False, http_session=None, zip_native=False, extraction_cache=None,
                  # Deprecated
                  schema=None, default_base_path=None, **options):
 
@@ -79,14 +105,20 @@ class Package(object):
                 UserWarning)
             base_path = default_base_path
 
-        # Extract from zip
-        tempdir, descriptor = _extract_zip_if_possible(descriptor)
-        if tempdir:
-            self.__tempdir = tempdir
+        # Resolve source (extract from zip or open it in place)
+        self.__tempdir = None
+        self.__lease = None
+        self.__archive = None
+        (self.__tempdir, self.__lease, self.__archive,
+            descriptor, source_base_path) = _resolve_source(
+            descriptor, http_session=http_session, zip_native=zip_native,
+            extraction_cache=extraction_cache)
 
         # Get base path
         if base_path is None:
-            base_path = helpers.get_descriptor_base_path(descriptor)
+            base_path = source_base_path
+            if base_path is None:
+                base_path = helpers.get_descriptor_base_path(descriptor)
 
         # Instantiate storage
         if storage and not isinstance(storage, Storage):
@@ -99,8 +131,9 @@ class Package(object):
                 descriptor['resources'].append({'path': bucket})
 
         # Process descriptor
-        descriptor = helpers.retrieve_descriptor(descriptor)
-        descriptor = helpers.dereference_package_descriptor(descriptor, base_path)
+        descriptor = helpers.retrieve_descriptor(descriptor, http_session=http_session)
+        descriptor = helpers.dereference_package_descriptor(
+            descriptor, base_path, http_session=http_session, archive=self.__archive)
 
         # Handle deprecated resource.path/url
         for resource in descriptor.get('resources', []):
@@ -113,14 +146,23 @@ class Package(object):
                 resource['path'] = [url]
 
         # Set attributes
+        # (the caller's descriptor is copied with inline data to be isolated)
         self.__current_descriptor = deepcopy(descriptor)
-        self.__next_descriptor = deepcopy(descriptor)
+        self.__next_descriptor = None
         self.__base_path = base_path
         self.__storage = storage
         self.__strict = strict
         self.__unsafe = unsafe
+        self.__lazy = lazy
+        self.__http_session = http_session
+        self.__profile = None
         self.__resources = []
+        self.__resources_descriptors = []
+        self.__resources_errors = []
+        self.__resources_index = {}
+        self.__resource_names = []
         self.__errors = []
+        self.__relations_cache = ForeignKeyIndexCache()
 
         # Build package
         self.__build()
@@ -168,6 +210,8 @@ class Package(object):
 
         """
         # Never use self.descriptor inside this class (!!!)
+        if self.__next_descriptor is None:
+            self.__next_descriptor = deepcopy(self.__current_descriptor)
         return self.__next_descriptor
 
     @property
@@ -184,10 +228,14 @@ class Package(object):
     def resources(self):
         """Package's resources
 
+        > In lazy mode it's a sequence instantiating resources on first access
+
         # Returns
             Resource[]: returns an array of `Resource` instances
 
         """
+        if self.__lazy:
+            return _LazyResources(self.__count_resources, self.__get_resource)
         return self.__resources
 
     @property
@@ -198,7 +246,7 @@ class Package(object):
             str[]: returns an array of resource names
 
         """
-        return [resource.name for resource in self.resources]
+        return list(self.__resource_names)
 
     def get_resource(self, name):
         """Get data package resource by name.
@@ -210,10 +258,10 @@ class Package(object):
             Resource/None: returns `Resource` instances or null if not found
 
         """
-        for resource in self.resources:
-            if resource.name == name:
-                return resource
-        return None
+        index = self.__resources_index.get(name)
+        if index is None:
+            return None
+        return self.__get_resource(index)
 
     def add_resource(self, descriptor):
         """Add new resource to data package.
@@ -230,10 +278,33 @@ class Package(object):
             Resource/None: returns added `Resource` instance or null if not added
 
         """
+        return self.add_resources([descriptor])[0]
+
+    def add_resources(self, descriptors):
+        """Add new resources to data package.
+
+        It's the same as `package.add_resource` but the data package
+        will be rebuilt and validated only once for all the resources.
+
+        # Arguments
+            descriptors (dict[]): data resource descriptors
+
+        # Raises
+            DataPackageException: raises error if something goes wrong
+
+        # Returns
+            Resource[]: returns added `Resource` instances
+
+        """
+        descriptors = list(map(deepcopy, descriptors))
+        if not descriptors:
+            return []
         self.__current_descriptor.setdefault('resources', [])
-        self.__current_descriptor['resources'].append(descriptor)
+        self.__current_descriptor['resources'].extend(descriptors)
         self.__build()
-        return self.__resources[-1]
+        count = self.__count_resources()
+        return [self.__get_resource(index)
+            for index in range(count - len(descriptors), count)]
 
     def remove_resource(self, name):
         """Remove data package resource by name.
@@ -250,13 +321,35 @@ class Package(object):
             Resource/None: returns removed `Resource` instances or null if not found
 
         """
-        resource = self.get_resource(name)
-        if resource:
-            predicat = lambda resource: resource.get('name') != name
+        resources = self.remove_resources([name])
+        return resources[0] if resources else None
+
+    def remove_resources(self, names):
+        """Remove data package resources by names.
+
+        It's the same as `package.remove_resource` but the data package
+        will be rebuilt and validated only once for all the resources.
+
+        # Arguments
+            names (str[]): data resource names
+
+        # Raises
+            DataPackageException: raises error if something goes wrong
+
+        # Returns
+            Resource[]: returns removed `Resource` instances (not found are skipped)
+
+        """
+        names = set(names)
+        resources = [self.__get_resource(index)
+            for index, descriptor in enumerate(self.__resources_descriptors)
+            if descriptor.get('name') in names]
+        if resources:
+            predicat = lambda resource: resource.get('name') not in names
             self.__current_descriptor['resources'] = list(filter(
                 predicat, self.__current_descriptor['resources']))
             self.__build()
-        return resource
+        return resources
 
     def get_group(self, name):
         """Returns a group of tabular resources by name.
@@ -280,7 +373,7 @@ class Package(object):
             return None
         return Group(resources)
 
-    def infer(self, pattern=False):
+    def infer(self, pattern=False, integrity=False):
         """Infer a data package metadata.
 
         > Argument `pattern` works only for local files
@@ -292,6 +385,7 @@ class Package(object):
 
         # Arguments
             pattern (str): glob pattern for new resources
+            integrity (bool): infer resources' `bytes` and `hash` (see `resource.infer`)
 
         # Returns
             dict: returns data package descriptor
@@ -308,20 +402,25 @@ class Package(object):
 
             # Add resources
             options = {'recursive': True} if '**' in pattern else {}
-            for path in glob.glob(os.path.join(self.__base_path, pattern), **options):
-                self.add_resource({'path': os.path.relpath(path, self.__base_path)})
+            paths = glob.glob(os.path.join(self.__base_path, pattern), **options)
+            self.add_resources([
+                {'path': os.path.relpath(path, self.__base_path)} for path in paths])
 
         # Resources
+        # (the resource is updated in-place so only its descriptor has to be revalidated)
         for index, resource in enumerate(self.resources):
-            descriptor = resource.infer()
+            descriptor = helpers.copy_descriptor(resource.infer(integrity=integrity))
             self.__current_descriptor['resources'][index] = descriptor
-            self.__build()
+            self.__resources_descriptors[index] = descriptor
+            self.__resources_errors[index] = None
 
         # Profile
-        if self.__next_descriptor['profile'] == config.DEFAULT_DATA_PACKAGE_PROFILE:
+        if self.__current_descriptor['profile'] == config.DEFAULT_DATA_PACKAGE_PROFILE:
             if self.resources and all(map(lambda resource: resource.tabular, self.resources)):
                 self.__current_descriptor['profile'] = 'tabular-data-package'
-                self.__build()
+
+        # Rebuild package
+        self.__build()
 
         return self.__current_descriptor
 
@@ -353,15 +452,49 @@ class Package(object):
             bool: returns true on success and false if not modified
 
         """
+        modified = self.__next_descriptor is not None and self.__merge_next_descriptor()
         if strict is not None:
             self.__strict = strict
-        elif self.__current_descriptor == self.__next_descriptor:
+        elif not modified:
             return False
-        self.__current_descriptor = deepcopy(self.__next_descriptor)
         self.__build()
         return True
 
-    def save(self, target=None, storage=None, merge_groups=False, to_base_path=False, **options):
+    def check_integrity(self, workers=None):
+        """Checks integrity of all the package's resources
+
+        It checks size in BYTES and hash of every resource's data
+        against `descriptor.bytes` and `descriptor.hash` (see `resource.check_integrity`).
+        Resources are checked concurrently so it's bounded by I/O.
+
+        # Arguments
+            workers (int): number of concurrent checks (`config.INTEGRITY_WORKERS` by default)
+
+        # Returns
+            dict[]: report with `{'name'\\: <name>, 'valid'\\: <bool>, 'error'\\: <exception>}`
+                item for every resource (`error` is None for valid resources)
+
+        """
+        resources = self.resources
+        if workers is None:
+            workers = config.INTEGRITY_WORKERS
+        if workers > 1 and len(resources) > 1:
+            pool = ThreadPool(min(workers, len(resources)))
+            try:
+                errors = pool.map(_check_resource_integrity, resources)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            errors = list(map(_check_resource_integrity, resources))
+        report = []
+        for resource, error in zip(resources, errors):
+            report.append({'name': resource.name, 'valid': error is None, 'error': error})
+        return report
+
+    def save(self, target=None, storage=None, merge_groups=False, to_base_path=False,
+             compression=zipfile.ZIP_STORED, compression_level=None, allow_zip64=True,
+             include_remote=False, workers=None, integrity=False, **options):
         """Saves this data package
 
         It saves it to storage if `storage` argument is passed or
@@ -414,6 +547,22 @@ class Package(object):
             to_base_path (bool):
                 save the package to the package's base path
                 using the "<base_path>/<target>" route
+            compression (int):
+                zip compression method e.g. `zipfile.ZIP_DEFLATED`
+                (default to `zipfile.ZIP_STORED`)
+            compression_level (int):
+                zip compression level (requires Python 3.7+)
+            allow_zip64 (bool):
+                use ZIP64 extensions for members bigger than 2 GiB
+            include_remote (bool):
+                stream remote resources into the zip file in chunks
+                (by default they are kept as remote paths)
+            workers (int):
+                number of remote resources downloaded concurrently
+                to spooled temporary files before being added to the zip file
+            integrity (bool):
+                stamp `bytes` and SHA256 `hash` of resources copied to the zip file
+                into the saved descriptor (calculated while copying the data)
             options (dict):
                 storage options to use for storage creation
 
@@ -477,70 +626,236 @@ class Package(object):
 
         # Save package to zip
         else:
+            zip_options = {'allowZip64': allow_zip64}
+            if compression_level is not None:
+                if sys.version_info < (3, 7):
+                    message = 'Zip compression level requires Python 3.7+'
+                    raise exceptions.DataPackageException(message)
+                zip_options['compresslevel'] = compression_level
+            http_session = helpers.get_http_session(self.__http_session)
+            remote_sources = {}
             try:
-                with zipfile.ZipFile(target, 'w') as z:
+
+                # Download remote resources concurrently
+                if include_remote and workers and workers > 1:
+                    urls = [resource.source for resource in self.resources
+                        if resource.name and resource.remote and not resource.multipart]
+                    if urls:
+                        load = lambda url: _spool_remote_file(url, http_session)
+                        pool = ThreadPool(min(workers, len(urls)))
+                        try:
+                            remote_sources = dict(zip(urls, pool.map(load, urls)))
+                        finally:
+                            pool.close()
+                            pool.join()
+
+                with zipfile.ZipFile(target, 'w', compression, **zip_options) as z:
                     descriptor = json.loads(json.dumps(self.__current_descriptor))
                     for index, resource in enumerate(self.resources):
                         if not resource.name:
                             continue
-                        if not resource.local:
+                        if resource.remote and not (include_remote and not resource.multipart):
+                            continue
+                        if not resource.local and not resource.remote:
                             continue
-                        path = os.path.abspath(resource.source)
                         basename = resource.descriptor.get('name')
                         resource_format = resource.descriptor.get('format')
                         if resource_format:
                             basename = '.'.join([basename, resource_format.lower()])
                         path_inside_dp = os.path.join('data', basename)
-                        z.write(path, path_inside_dp)
+                        member = None
+                        if self.__archive is not None:
+                            member = self.__archive.get_member(resource.source)
+                        hasher = hashlib.sha256() if integrity else None
+                        if resource.remote:
+                            if resource.source in remote_sources:
+                                source, size = remote_sources.pop(resource.source)
+                                with source:
+                                    size = _write_zip_member(z, path_inside_dp,
+                                        [source], size, allow_zip64, hasher)
+                            else:
+                                size, chunks = _iter_remote_file(resource.source, http_session)
+                                size = _write_zip_member(z, path_inside_dp,
+                                    chunks, size, allow_zip64, hasher)
+                        elif member is not None:
+                            with self.__archive.open(member) as source:
+                                size = self.__archive.getinfo(member).file_size
+                                size = _write_zip_member(z, path_inside_dp,
+                                    [source], size, allow_zip64, hasher)
+                        elif integrity:
+                            path = os.path.abspath(resource.source)
+                            with io.open(path, 'rb') as source:
+                                size = _write_zip_member(z, path_inside_dp,
+                                    [source], os.path.getsize(path), allow_zip64, hasher)
+                        else:
+                            z.write(os.path.abspath(resource.source), path_inside_dp)
                         descriptor['resources'][index]['path'] = path_inside_dp
+                        if integrity:
+                            descriptor['resources'][index]['bytes'] = size
+                            descriptor['resources'][index]['hash'] = 'sha256:%s' % hasher.hexdigest()
                     z.writestr('datapackage.json', json.dumps(descriptor, indent=4))
-            except (IOError, zipfile.BadZipfile, zipfile.LargeZipFile) as exception:
+            except (IOError, zipfile.BadZipfile, zipfile.LargeZipFile,
+                    requests.exceptions.RequestException) as exception:
                 six.raise_from(exceptions.DataPackageException(exception), exception)
+            finally:
+                for source, _ in remote_sources.values():
+                    source.close()
 
         return True
 
+    def close(self):
+        """Release resources held by the package
+
+        It closes the zip archive opened in place (see `zip_native`),
+        removes the temporary directory a zip has been extracted to
+        or releases the extraction cache entry (see `extraction_cache`).
+        The package can't read its zipped resources after closing.
+
+        """
+        if self.__archive is not None:
+            self.__archive.close()
+            self.__archive = None
+        if self.__tempdir is not None:
+            shutil.rmtree(self.__tempdir, ignore_errors=True)
+            self.__tempdir = None
+        if self.__lease is not None:
+            self.__lease.release()
+            self.__lease = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
     # Private
 
     def __del__(self):
-        if hasattr(self, '_tempdir') and os.path.exists(self.__tempdir):
-            shutil.rmtree(self.__tempdir, ignore_errors=True)
+        try:
+            self.close()
+        except Exception:
+            pass
 
     def __build(self):
 
         # Process descriptor
-        expand = helpers.expand_package_descriptor
-        self.__current_descriptor = expand(self.__current_descriptor)
-        self.__next_descriptor = deepcopy(self.__current_descriptor)
+        self.__current_descriptor.setdefault('profile', config.DEFAULT_DATA_PACKAGE_PROFILE)
+        descriptors = self.__current_descriptor.get('resources', [])
+
+        # Match resources
+        # (committed descriptors are never changed in-place so the same object
+        # means the same resource; see `__merge_next_descriptor` for commits)
+        resources = []
+        resources_errors = []
+        created = []
+        indexes = dict((id(item), index) for index, item in enumerate(self.__resources_descriptors))
+        for index, descriptor in enumerate(descriptors):
+            match = indexes.get(id(descriptor))
+            if match is not None:
+                resources.append(self.__resources[match])
+                resources_errors.append(self.__resources_errors[match])
+            else:
+                helpers.expand_resource_descriptor(descriptor)
+                resources.append(None)
+                resources_errors.append(None)
+                created.append(index)
+        changed = bool(created) or len(resources) != len(self.__resources)
+        self.__next_descriptor = None
 
         # Instantiate profile
-        self.__profile = Profile(self.__current_descriptor.get('profile'))
+        profile = self.__current_descriptor.get('profile')
+        if not self.__profile or self.__profile.name != profile:
+            resources_errors = [None] * len(resources)
+        self.__profile = Profile(profile, http_session=self.__http_session)
 
         # Validate descriptor
         try:
-            self.__profile.validate(self.__current_descriptor)
+            self.__profile._validate_package(
+                self.__current_descriptor, resources_errors, fail_fast=self.__strict)
             self.__errors = []
         except exceptions.ValidationError as exception:
             self.__errors = exception.errors
             if self.__strict:
                 raise exception
 
-        # Update resource
-        descriptors = self.__current_descriptor.get('resources', [])
-        self.__resources = self.__resources[:len(descriptors)]
-        iterator = enumerate(six.moves.zip_longest(list(self.__resources), descriptors))
-        for index, (resource, descriptor) in iterator:
-            if (not resource or resource.descriptor != descriptor or
-                    (resource.schema and resource.schema.foreign_keys)):
-                updated_resource = Resource(descriptor,
-                    base_path=self.__base_path,
-                    strict=self.__strict,
-                    unsafe=self.__unsafe,
-                    storage=self.__storage,
-                    package=self)
-                if not resource:
-                    self.__resources.append(updated_resource)
+        # Update resources
+        if changed:
+            self.__relations_cache.clear()
+        self.__resources = resources
+        self.__resources_descriptors = list(descriptors)
+        self.__resources_errors = resources_errors
+
+        # Index resources
+        self.__resource_names = []
+        self.__resources_index = {}
+        for index, descriptor in enumerate(descriptors):
+            name = descriptor.get('name')
+            self.__resource_names.append(name)
+            self.__resources_index.setdefault(name, index)
+
+        # Instantiate resources
+        if not self.__lazy:
+            for index in created:
+                self.__get_resource(index)
+
+    def __merge_next_descriptor(self):
+        next_descriptor = self.__next_descriptor
+
+        # Not modified
+        if self.__current_descriptor == next_descriptor:
+            return False
+
+        # Merge resources
+        # (unchanged resources keep their committed descriptors)
+        resources = next_descriptor.get('resources')
+        if isinstance(resources, list):
+            merged_resources = []
+            for index, descriptor in enumerate(resources):
+                if (index < len(self.__resources_descriptors) and
+                        self.__resources_descriptors[index] == descriptor):
+                    merged_resources.append(self.__resources_descriptors[index])
                 else:
-                    self.__resources[index] = updated_resource
+                    merged_resources.append(deepcopy(descriptor))
+            resources = merged_resources
+        else:
+            resources = deepcopy(resources)
+
+        # Merge descriptor
+        descriptor = {}
+        for key, value in next_descriptor.items():
+            descriptor[key] = resources if key == 'resources' else deepcopy(value)
+        self.__current_descriptor = descriptor
+
+        return True
+
+    def __count_resources(self):
+        return len(self.__resources)
+
+    def __get_resource(self, index):
+        resource = self.__resources[index]
+        if resource is None:
+            descriptor = self.__resources_descriptors[index]
+
+            # Reuse validation if the resource has been validated by the same schema
+            validation_errors = None
+            if self.__profile._validates_resource_profile(descriptor.get('profile')):
+                validation_errors = self.__resources_errors[index]
+
+            options = {}
+            if self.__http_session is not None:
+                options['http_session'] = self.__http_session
+            resource = Resource(descriptor,
+                base_path=self.__base_path,
+                strict=self.__strict,
+                unsafe=self.__unsafe,
+                storage=self.__storage,
+                package=self,
+                validation_errors=validation_errors,
+                archive=self.__archive,
+                relations_cache=self.__relations_cache,
+                **options)
+            self.__resources[index] = resource
+        return resource
 
     # Deprecated
 
@@ -647,46 +962,276 @@ class Package(object):
 
 # Internal
 
-def _extract_zip_if_possible(descriptor):
-    """If descriptor is a path to zip file extract and return (tempdir, descriptor)
+_ZIP_MAGIC = [b'PK\x03\x04', b'PK\x05\x06']
+_CHUNK_SIZE = 64 * 1024
+
+
+class _LazyResources(Sequence):
+    """Sequence of package's resources instantiating them on first access
+    """
+
+    # Public
+
+    def __init__(self, count, get):
+        self.__count = count
+        self.__get = get
+
+    def __len__(self):
+        return self.__count()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[index] for index in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('resource index out of range')
+        return self.__get(index)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+def _resolve_source(descriptor, http_session=None, zip_native=False, extraction_cache=None):
+    """Resolve descriptor source and return (tempdir, lease, archive, descriptor, base_path)
+
+    The source is classified using cheap checks (filesystem stat, URL scheme,
+    magic bytes) before any I/O: local JSON, local zip, remote JSON, remote zip,
+    zip contents or file-like object. A zip is extracted and the path to
+    its `datapackage.json` is returned (or it's opened in place as `Archive`
+    if `zip_native`). With an extraction cache a zip is extracted only once
+    and leased from the cache instead of a temporary directory.
+    Remote JSON is loaded once.
+    The `base_path` is None if it has to be inferred from the result.
     """
-    tempdir = None
-    result = descriptor
+    the_zip = None
+
+    # Path or URL
+    if isinstance(descriptor, six.string_types):
+        if os.path.isfile(descriptor):
+            with io.open(descriptor, 'rb') as file:
+                if file.read(4) in _ZIP_MAGIC:
+                    the_zip = descriptor
+        elif urlparse(descriptor).scheme in ['http', 'https']:
+            the_zip = _load_remote_source(descriptor, http_session)
+            if not hasattr(the_zip, 'read'):
+                return (None, None, None, the_zip, os.path.dirname(descriptor))
+
+    # Zip contents
+    elif isinstance(descriptor, bytes):
+        if descriptor[:4] in _ZIP_MAGIC:
+            the_zip = io.BytesIO(descriptor)
+
+    # File-like object
+    elif hasattr(descriptor, 'read') and hasattr(descriptor, 'seek'):
+        if descriptor.read(4) in _ZIP_MAGIC:
+            the_zip = descriptor
+        descriptor.seek(0)
+
+    # Not a zip
+    if the_zip is None:
+        return (None, None, None, descriptor, None)
+
+    # Open zip in place
+    if zip_native:
+        archive = None
+        try:
+            archive = Archive(the_zip, close_source=the_zip is not descriptor)
+            _validate_zip(archive)
+            descriptor_path = [
+                f for f in archive.namelist() if f.endswith('datapackage.json')][0]
+            contents = archive.read(descriptor_path).decode('utf-8')
+            base_path = archive.root
+            if posixpath.dirname(descriptor_path):
+                base_path = os.path.join(base_path, posixpath.dirname(descriptor_path))
+            return (None, None, archive, json.loads(contents), base_path)
+        except (zipfile.BadZipfile, ValueError, exceptions.DataPackageException) as exception:
+            if archive is not None:
+                archive.close()
+            if isinstance(exception, exceptions.DataPackageException):
+                raise
+            message = 'Unable to open zip at "%s"' % (
+                descriptor if isinstance(descriptor, six.string_types) else 'stream')
+            six.raise_from(exceptions.DataPackageException(message), exception)
+
+    # Extract zip
+    if extraction_cache is None and config.EXTRACTION_CACHE_DIR:
+        extraction_cache = ExtractionCache(config.EXTRACTION_CACHE_DIR)
     try:
-        if isinstance(descriptor, six.string_types):
-            res = requests.get(descriptor)
-            res.raise_for_status()
-            result = res.content
-    except (IOError,
-            ValueError,
-            requests.exceptions.RequestException):
-        pass
+        with zipfile.ZipFile(the_zip, 'r') as z:
+            _validate_zip(z)
+            descriptor_path = [
+                f for f in z.namelist() if f.endswith('datapackage.json')][0]
+            if extraction_cache is not None:
+                key = extraction_cache.get_key(the_zip)
+                lease = extraction_cache.lease(key)
+                try:
+                    path = extraction_cache.extract(z, key)
+                except Exception:
+                    lease.release()
+                    raise
+                return (None, lease, None, os.path.join(path, descriptor_path), None)
+            tempdir = tempfile.mkdtemp('-datapackage')
+            z.extractall(tempdir)
+    except zipfile.BadZipfile as exception:
+        message = 'Unable to open zip at "%s"' % (
+            descriptor if isinstance(descriptor, six.string_types) else 'stream')
+        six.raise_from(exceptions.DataPackageException(message), exception)
+    finally:
+        if the_zip is not descriptor:
+            if hasattr(the_zip, 'close'):
+                the_zip.close()
+        elif hasattr(descriptor, 'seek'):
+            descriptor.seek(0)
+
+    return (tempdir, None, None, os.path.join(tempdir, descriptor_path), None)
+
+
+def _load_remote_source(url, http_session=None):
+    """Load remote source returning zip file-like object, descriptor dict or the url
+
+    A `.json` URL is loaded in one request (so it can be served by the HTTP
+    cache). Other sources are streamed and sniffed by magic bytes: a zip is
+    written to a spooled temporary file and other sources are decoded as JSON.
+    The url is returned on failure so the descriptor retrieval reports the error.
+    """
+    http_session = helpers.get_http_session(http_session)
     try:
-        the_zip = result
-        if isinstance(the_zip, bytes):
-            try:
-                os.path.isfile(the_zip)
-            except (TypeError, ValueError):
-                # the_zip contains the zip file contents
-                the_zip = io.BytesIO(the_zip)
-        if zipfile.is_zipfile(the_zip):
-            with zipfile.ZipFile(the_zip, 'r') as z:
-                _validate_zip(z)
-                descriptor_path = [
-                    f for f in z.namelist() if f.endswith('datapackage.json')][0]
-                tempdir = tempfile.mkdtemp('-datapackage')
-                z.extractall(tempdir)
-                result = os.path.join(tempdir, descriptor_path)
-        else:
-            result = descriptor
-    except (TypeError,
-            zipfile.BadZipfile):
-        pass
-    if hasattr(descriptor, 'seek'):
-        # Rewind descriptor if it's a file, as we read it for testing if it's
-        # a zip file
-        descriptor.seek(0)
-    return (tempdir, result)
+
+        # JSON URL
+        if urlparse(url).path.lower().endswith('.json'):
+            response = http_session.get(url)
+            response.raise_for_status()
+            # Force UTF8 encoding for 'text/plain' sources
+            response.encoding = 'utf8'
+            return response.json()
+
+        # Other URL
+        response = http_session.get(url, stream=True)
+        try:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=_CHUNK_SIZE)
+
+            # Sniff
+            head = b''
+            for chunk in chunks:
+                head += chunk
+                if len(head) >= 4:
+                    break
+
+            # Zip
+            if head[:4] in _ZIP_MAGIC:
+                spool = tempfile.SpooledTemporaryFile(max_size=config.REMOTE_ZIP_SPOOL_SIZE)
+                try:
+                    spool.write(head)
+                    for chunk in chunks:
+                        spool.write(chunk)
+                except Exception:
+                    spool.close()
+                    raise
+                spool.seek(0)
+                return spool
+
+            # Descriptor
+            contents = b''.join([head] + list(chunks))
+
+        finally:
+            response.close()
+        return json.loads(contents.decode('utf-8'))
+
+    except (IOError, ValueError, requests.exceptions.RequestException):
+        return url
+
+
+def _check_resource_integrity(resource):
+    """Check resource integrity returning an error or None
+    """
+    try:
+        resource.check_integrity()
+    except exceptions.DataPackageException as exception:
+        return exception
+    except (IOError, requests.exceptions.RequestException) as exception:
+        return exceptions.DataPackageException(exception)
+    return None
+
+
+def _iter_remote_file(url, http_session):
+    """Start streaming remote file returning (size, chunks)
+
+    The size is None if it's not known in advance.
+    """
+    response = http_session.get(url, stream=True)
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
+    size = None
+    if 'Content-Length' in response.headers and 'Content-Encoding' not in response.headers:
+        size = int(response.headers['Content-Length'])
+
+    def iter_chunks():
+        try:
+            for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                yield chunk
+        finally:
+            response.close()
+
+    return (size, iter_chunks())
+
+
+def _spool_remote_file(url, http_session):
+    """Download remote file to a spooled temporary file returning (file, size)
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=config.REMOTE_ZIP_SPOOL_SIZE)
+    try:
+        _, chunks = _iter_remote_file(url, http_session)
+        for chunk in chunks:
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+    size = spool.tell()
+    spool.seek(0)
+    return (spool, size)
+
+
+def _write_zip_member(z, name, sources, size=None, allow_zip64=True, hasher=None):
+    """Write zip member from chunks or file-like objects without loading it into memory
+
+    ZIP64 is forced for members of unknown size if it's allowed.
+    Written data is fed to `hasher` if passed. It returns the written size.
+    """
+    chunks = _iter_zip_member_chunks(sources, hasher)
+    if sys.version_info < (3, 6):
+        # Members can't be written as streams
+        contents = b''.join(chunks)
+        z.writestr(name, contents)
+        return len(contents)
+    written = 0
+    force_zip64 = allow_zip64 and (size is None or size * 1.05 > zipfile.ZIP64_LIMIT)
+    with z.open(name, 'w', force_zip64=force_zip64) as file:
+        for chunk in chunks:
+            file.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def _iter_zip_member_chunks(sources, hasher=None):
+    for source in sources:
+        chunks = [source]
+        if hasattr(source, 'read'):
+            chunks = iter(lambda: source.read(_CHUNK_SIZE), b'')
+        for chunk in chunks:
+            if hasher is not None:
+                hasher.update(chunk)
+            yield chunk
 
 
 def _validate_zip(the_zip):
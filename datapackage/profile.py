@@ -5,11 +5,17 @@ from __future__ import unicode_literals
 
 import six
 import copy
+import itertools
 import warnings
+import threading
 import requests
 import jsonschema
 import datapackage.registry
+from collections import OrderedDict
 from . import exceptions
+from . import compiler
+from . import helpers
+from . import config
 
 
 # Module API
@@ -17,8 +23,18 @@ from . import exceptions
 class Profile(object):
     """Profile representation
 
+    Profiles given by a registry name or URL are parsed, checked and compiled
+    only once per process and shared between instances (see `Profile.clear_cache`).
+
+    With `compiled` enabled a profile is also turned into a specialized Python
+    check function (its source is cached on disk in `config.COMPILED_PROFILES_DIR`).
+    Valid descriptors pass this check without `jsonschema` while invalid ones
+    are still validated by `jsonschema` so errors stay the same.
+
     # Arguments
         profile (str): profile name in registry or URL to JSON Schema
+        compiled (bool): use compiled checks (`config.COMPILED_PROFILES` by default)
+        http_session (requests.Session): HTTP session to load remote profiles
 
     # Raises
         DataPackageException: raises error if something goes wrong
@@ -27,13 +43,50 @@ class Profile(object):
 
     # Public
 
-    def __init__(self, profile):
+    def __init__(self, profile, compiled=None, http_session=None):
         self._name = profile
+        self._http_session = http_session
+        self._compiled_checks = (
+            config.COMPILED_PROFILES if compiled is None else compiled)
+
+        # Get from cache
+        self._compiled = _get_cached_profile(profile)
+        if self._compiled is not None:
+            self._registry = self._compiled['registry']
+            self._schema = self._compiled['schema']
+            self._validator = self._compiled['validator']
+            return
+
+        # Load profile
         self._registry = self._load_registry()
         self._schema = self._load_schema(profile, self._registry)
         self._validator = self._load_validator(self._schema, self._registry)
         self._check_schema()
 
+        # Put to cache
+        self._compiled = {
+            'registry': self._registry,
+            'schema': self._schema,
+            'validator': self._validator,
+        }
+        _set_cached_profile(profile, self._compiled)
+
+    @staticmethod
+    def clear_cache(profile=None):
+        """Clear the process-wide cache of compiled profiles
+
+        It's useful if a remote profile has been changed.
+
+        # Arguments
+            profile (str): profile name or URL to clear (all profiles by default)
+
+        """
+        with _cache_lock:
+            if profile is None:
+                _cache.clear()
+            else:
+                _cache.pop(profile, None)
+
     @property
     def name(self):
         """Profile name
@@ -48,17 +101,20 @@ class Profile(object):
     def jsonschema(self):
         """JSONSchema content
 
+        > It's shared between instances so it must not be modified in-place
+
         # Returns
             dict: returns profile's JSON Schema contents
 
         """
         return self._schema
 
-    def validate(self, descriptor):
+    def validate(self, descriptor, fail_fast=False):
         """Validate a data package `descriptor` against the profile.
 
         # Arguments
             descriptor (dict): retrieved and dereferenced data package descriptor
+            fail_fast (bool): stop on the first error (`exception.errors` will have only it)
 
         # Raises
             ValidationError: raises if not valid
@@ -67,33 +123,157 @@ class Profile(object):
 
         """
 
+        # Fast check
+        if self._check('check', self._schema, descriptor):
+            return True
+
         # Collect errors
-        errors = []
-        for error in self._validator.iter_errors(descriptor):
-            if isinstance(error, jsonschema.exceptions.ValidationError):
-                message = str(error.message)
-                if six.PY2:
-                    message = message.replace('u\'', '\'')
-                descriptor_path = '/'.join(map(str, error.path))
-                profile_path = '/'.join(map(str, error.schema_path))
-                error = exceptions.ValidationError(
-                    'Descriptor validation error: %s '
-                    'at "%s" in descriptor and '
-                    'at "%s" in profile'
-                    % (message, descriptor_path, profile_path))
-            errors.append(error)
+        errors = self._validator.iter_errors(descriptor)
+        errors = list(map(_format_error, _take_errors(errors, fail_fast)))
 
         # Raise error
-        if errors:
-            message = 'There are %s validation errors (see exception.errors)' % len(errors)
-            raise exceptions.ValidationError(message, errors=errors)
+        _raise_errors(errors)
 
         return True
 
+    def is_valid(self, descriptor):
+        """Check if a data package `descriptor` is valid against the profile.
+
+        It stops on the first error and doesn't format error messages.
+
+        # Arguments
+            descriptor (dict): retrieved and dereferenced data package descriptor
+
+        # Returns
+            bool: returns True if valid
+
+        """
+        if self._check('check', self._schema, descriptor):
+            return True
+        return self._validator.is_valid(descriptor)
+
     # Private
 
+    def _validate_package(self, descriptor, resources_errors, fail_fast=False):
+        """Validate a data package `descriptor` reusing resources' errors.
+
+        `resources_errors` is a list of raw errors per resource (`None` if
+        the resource has to be validated). It's updated in-place so
+        only changed resources are validated on the next call.
+        It falls back to full validation if the profile can't be split.
+
+        """
+
+        # Not splittable
+        split = self._get_split()
+        if split is None:
+            return self.validate(descriptor, fail_fast=fail_fast)
+
+        # Collect errors
+        validator, resource_schema = split
+        errors = []
+        if not self._check('package_check', validator.schema, descriptor):
+            package_errors = _take_errors(validator.iter_errors(descriptor), fail_fast)
+            errors.extend(map(_format_error, package_errors))
+        resources = descriptor.get('resources')
+        if isinstance(resources, list):
+            for index, resource in enumerate(resources):
+                if fail_fast and errors:
+                    break
+                if resources_errors[index] is None:
+                    resource_errors = []
+                    if not self._check('resource_check', resource_schema, resource):
+                        resource_errors = self._validator.descend(resource, resource_schema)
+                        resource_errors = _take_errors(resource_errors, fail_fast)
+                    # Partially collected errors are not reusable
+                    if fail_fast and resource_errors:
+                        errors.append(_format_error(resource_errors[0],
+                            path=['resources', index],
+                            schema_path=['properties', 'resources', 'items']))
+                        break
+                    resources_errors[index] = resource_errors
+                for error in _take_errors(iter(resources_errors[index]), fail_fast):
+                    errors.append(_format_error(error,
+                        path=['resources', index],
+                        schema_path=['properties', 'resources', 'items']))
+
+        # Raise error
+        _raise_errors(errors)
+
+        return True
+
+    def _validate_errors(self, errors, fail_fast=False):
+        """Raise for raw errors collected by `_validate_package` for a resource
+        """
+        errors = list(map(_format_error, _take_errors(iter(errors), fail_fast)))
+        _raise_errors(errors)
+        return True
+
+    def _validates_resource_profile(self, profile):
+        """Check that resources are validated by the same schema as the `profile` has
+
+        If so, resources' errors collected by `_validate_package` are
+        the same as the resource profile would give.
+
+        """
+        if not isinstance(profile, six.string_types):
+            return False
+        validates = self._compiled.setdefault('validates', {})
+        if profile not in validates:
+            result = False
+            split = self._get_split()
+            if split is not None:
+                try:
+                    resource_profile = Profile(profile)
+                except exceptions.ValidationError:
+                    resource_profile = None
+                if (resource_profile is not None and
+                        type(resource_profile._validator) is type(self._validator)):
+                    result = (_strip_schema_uri(resource_profile.jsonschema) ==
+                              _strip_schema_uri(split[1]))
+            validates[profile] = result
+        return validates[profile]
+
+    def _get_split(self):
+        """Return (package validator, resource schema) or None if not splittable.
+
+        The package validator doesn't descend into the resources so
+        they can be validated one by one against the resource schema.
+
+        """
+        if 'split' not in self._compiled:
+            split = None
+            properties = self._schema.get('properties')
+            resources = properties.get('resources') if isinstance(properties, dict) else None
+            if (isinstance(resources, dict) and
+                    isinstance(resources.get('items'), dict) and
+                    not set(self._schema).intersection(_UNSPLITTABLE_PACKAGE_KEYWORDS) and
+                    not set(resources).intersection(_UNSPLITTABLE_RESOURCES_KEYWORDS)):
+                schema = dict(self._schema)
+                schema['properties'] = dict(properties)
+                schema['properties']['resources'] = dict(resources)
+                del schema['properties']['resources']['items']
+                validator = self._load_validator(schema, self._registry)
+                split = (validator, resources['items'])
+            self._compiled['split'] = split
+        return self._compiled['split']
+
+    def _check(self, key, schema, descriptor):
+        """Return True if the descriptor passes the compiled check for the schema
+
+        The check is compiled on the first use and shared between instances.
+        It returns False if compiled checks are disabled or not available.
+
+        """
+        if not self._compiled_checks:
+            return False
+        if key not in self._compiled:
+            self._compiled[key] = compiler.compile_schema(schema, type(self._validator))
+        check = self._compiled[key]
+        return check is not None and check(descriptor)
+
     def _load_registry(self):
-        return datapackage.registry.Registry()
+        return datapackage.registry.Registry(http_session=self._http_session)
 
     def _load_schema(self, schema, registry):
         the_schema = schema
@@ -104,7 +284,7 @@ class Profile(object):
             try:
                 the_schema = registry.get(schema)
                 if not the_schema:
-                    req = requests.get(schema)
+                    req = helpers.get_http_session(self._http_session).get(schema)
                     req.raise_for_status()
                     the_schema = req.json()
             except (IOError, ValueError, requests.exceptions.RequestException) as ex:
@@ -172,3 +352,75 @@ class Profile(object):
             UserWarning)
 
         return copy.deepcopy(self._schema)
+
+
+# Internal
+
+_UNSPLITTABLE_PACKAGE_KEYWORDS = [
+    '$ref', 'allOf', 'anyOf', 'oneOf', 'not', 'if', 'dependencies', 'patternProperties']
+_UNSPLITTABLE_RESOURCES_KEYWORDS = [
+    '$ref', 'allOf', 'anyOf', 'oneOf', 'not', 'if', 'uniqueItems', 'additionalItems', 'contains']
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _get_cached_profile(profile):
+    """Get compiled profile from the cache (LRU) or return None
+    """
+    if not isinstance(profile, six.string_types):
+        return None
+    with _cache_lock:
+        cached = _cache.pop(profile, None)
+        if cached is not None:
+            _cache[profile] = cached
+        return cached
+
+
+def _set_cached_profile(profile, cached):
+    """Put compiled profile to the cache evicting the least recently used ones
+    """
+    if not isinstance(profile, six.string_types):
+        return
+    with _cache_lock:
+        _cache[profile] = cached
+        while len(_cache) > config.PROFILE_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _format_error(error, path=[], schema_path=[]):
+    """Convert jsonschema error to ValidationError with optional path prefixes
+    """
+    if isinstance(error, jsonschema.exceptions.ValidationError):
+        message = str(error.message)
+        if six.PY2:
+            message = message.replace('u\'', '\'')
+        descriptor_path = '/'.join(map(str, list(path) + list(error.path)))
+        profile_path = '/'.join(map(str, list(schema_path) + list(error.schema_path)))
+        error = exceptions.ValidationError(
+            'Descriptor validation error: %s '
+            'at "%s" in descriptor and '
+            'at "%s" in profile'
+            % (message, descriptor_path, profile_path))
+    return error
+
+
+def _strip_schema_uri(schema):
+    """Return schema without the `$schema` keyword
+    """
+    return dict((key, value) for key, value in schema.items() if key != '$schema')
+
+
+def _take_errors(errors, fail_fast=False):
+    """Collect errors from iterator (only the first one if fail_fast)
+    """
+    if fail_fast:
+        return list(itertools.islice(errors, 1))
+    return list(errors)
+
+
+def _raise_errors(errors):
+    """Raise ValidationError if there are errors
+    """
+    if errors:
+        message = 'There are %s validation errors (see exception.errors)' % len(errors)
+        raise exceptions.ValidationError(message, errors=errors)
@@ -7,7 +7,7 @@ import io
 import os
 import json
 import six
-import requests
+from . import helpers
 from .exceptions import RegistryError
 
 
@@ -19,6 +19,8 @@ class Registry(object):
     Args:
         registry_path_or_url (str): Path or URL to the registry's CSV file. It
             defaults to the local registry cache path.
+        http_session (requests.Session): HTTP session for remote files. It
+            defaults to the shared session (see `helpers.get_http_session`).
 
     Raises:
         RegistryError: If there was some problem opening the registry file or
@@ -34,7 +36,8 @@ class Registry(object):
         'registry.json'
     )
 
-    def __init__(self, registry_path_or_url=DEFAULT_REGISTRY_PATH):
+    def __init__(self, registry_path_or_url=DEFAULT_REGISTRY_PATH, http_session=None):
+        self._http_session = http_session
         if os.path.isfile(registry_path_or_url):
             self._BASE_PATH = os.path.dirname(
                 os.path.abspath(registry_path_or_url)
@@ -140,7 +143,7 @@ class Registry(object):
 
     def _load_json_url(self, url):
         '''dict: Return the JSON at the local path or URL as a dict.'''
-        res = requests.get(url)
+        res = helpers.get_http_session(self._http_session).get(url)
         res.raise_for_status()
 
         return res.json()
@@ -7,17 +7,20 @@ import io
 import os
 import six
 import json
+import mmap
+import hashlib
 import warnings
+import posixpath
 try:
     from cchardet import detect
 except ImportError:
     from chardet import detect
-import requests
 from copy import deepcopy
+from collections import OrderedDict
 from tableschema import Table, Storage
 from six.moves.urllib.parse import urljoin, urlparse
-from six.moves.urllib.request import urlopen
 from .profile import Profile
+from .index import ForeignKeyIndex, ForeignKeyIndexCache, create_key_getter, index_foreign_keys
 from . import exceptions
 from . import helpers
 from . import config
@@ -34,6 +37,7 @@ class Resource(object):
         strict (bool):
             strict flag to alter validation behavior.  Setting it to `true`
             leads to throwing errors on any operation with invalid descriptor
+            (validation stops on the first error)
         unsafe (bool):
             if `True` unsafe paths will be allowed. For more inforamtion
             https\\://specs.frictionlessdata.io/data-resource/#data-location.
@@ -50,7 +54,8 @@ class Resource(object):
 
     def __init__(self, descriptor={}, base_path=None, strict=False, unsafe=False, storage=None,
                  # Internal
-                 package=None, **options):
+                 package=None, validation_errors=None, archive=None, relations_cache=None,
+                 **options):
 
         # Get base path
         if base_path is None:
@@ -61,8 +66,10 @@ class Resource(object):
             storage = Storage.connect(storage, **options)
 
         # Process descriptor
-        descriptor = helpers.retrieve_descriptor(descriptor)
-        descriptor = helpers.dereference_resource_descriptor(descriptor, base_path)
+        http_session = options.get('http_session')
+        descriptor = helpers.retrieve_descriptor(descriptor, http_session=http_session)
+        descriptor = helpers.dereference_resource_descriptor(
+            descriptor, base_path, http_session=http_session, archive=archive)
 
         # Handle deprecated resource.path.url
         if descriptor.get('url'):
@@ -72,18 +79,25 @@ class Resource(object):
                 UserWarning)
             descriptor['path'] = descriptor['url']
             del descriptor['url']
+            validation_errors = None
 
         # Set attributes
-        self.__current_descriptor = deepcopy(descriptor)
-        self.__next_descriptor = deepcopy(descriptor)
+        # (inline data is shared only with the package's committed descriptor)
+        copy = helpers.copy_descriptor if package is not None else deepcopy
+        self.__current_descriptor = copy(descriptor)
+        self.__next_descriptor = None
         self.__base_path = base_path
         self.__package = package
         self.__storage = storage
-        self.__relations = None
+        self.__relations_cache = relations_cache
+        if relations_cache is None:
+            self.__relations_cache = ForeignKeyIndexCache()
         self.__strict = strict
         self.__unsafe = unsafe
         self.__table = None
         self.__errors = []
+        self.__validation_errors = validation_errors
+        self.__archive = archive
         self.__table_options = options
 
         # Build resource
@@ -142,6 +156,8 @@ class Resource(object):
 
         """
         # Never use self.descriptor inside self class (!!!)
+        if self.__next_descriptor is None:
+            self.__next_descriptor = deepcopy(self.__current_descriptor)
         return self.__next_descriptor
 
     @property
@@ -347,8 +363,8 @@ class Resource(object):
             integrity = self.__get_integrity()
 
         # Get relations
-        if relations:
-            relations = self.__get_relations()
+        if relations and not options.get('foreign_keys_values'):
+            options['foreign_keys_values'] = self.__get_relations()
 
         return self.__get_table().iter(
             integrity=integrity, relations=relations, **options)
@@ -378,7 +394,7 @@ class Resource(object):
 
         # Get relations
         if relations and not foreign_keys_values:
-            relations = self.__get_relations()
+            foreign_keys_values = self.__get_relations()
 
         return self.__get_table().read(
             integrity=integrity, relations=relations,
@@ -387,11 +403,10 @@ class Resource(object):
     def check_integrity(self):
         """Checks resource integrity
 
-        > Only for tabular resources
-
-        It checks size in BYTES and SHA256 hash of the file
+        It checks size in BYTES and MD5/SHA1/SHA256/SHA512 hash of the file
         against `descriptor.bytes` and `descriptor.hash`
         (other hashing algorithms are not supported and will be skipped silently).
+        Raw bytes are hashed without parsing the data.
 
         # Raises
             exceptions.IntegrityError: raises if there are integrity issues
@@ -400,17 +415,55 @@ class Resource(object):
             bool: returns True if no issues
 
         """
-        # This function will benefit from rebasing it on `resource.raw_iter
-        for row in self.iter(integrity=True, cast=False):
-            pass
+
+        # Nothing to check
+        size = self.__current_descriptor.get('bytes')
+        hash = helpers.extract_hash(self.__current_descriptor.get('hash'))
+        if not size and not hash:
+            return True
+
+        # Inline/storage data has no bytes
+        if self.inline or self.__storage is not None:
+            for row in self.iter(integrity=True, cast=False):
+                pass
+            return True
+
+        # Calculate
+        hasher = hashlib.new(hash[0]) if hash else None
+        actual_size = 0
+        for chunk in self.__iter_raw_chunks():
+            actual_size += len(chunk)
+            if hasher is not None:
+                hasher.update(chunk)
+
+        # Check
+        violations = []
+        if size and size != actual_size:
+            violations.append('size "%s"' % actual_size)
+        if hash and hash[1] != hasher.hexdigest():
+            violations.append('hash "%s"' % hasher.hexdigest())
+        if violations:
+            message = 'Calculated %s differ(s) from declared value(s)'
+            raise exceptions.IntegrityError(message % ' and '.join(violations))
+
         return True
 
-    def check_relations(self, foreign_keys_values=False):
+    def check_relations(self, foreign_keys_values=False, memory_limit=None):
         """Check relations
 
         > Only for tabular resources
 
         It checks foreign keys and raises an exception if there are integrity issues.
+        Only membership of keys is tested: referenced rows are not resolved
+        and only foreign key fields are cast. Self-referencing foreign keys
+        are checked in a single pass: referenced keys are indexed as rows
+        go by and references not found yet are checked at the end.
+
+        # Arguments
+            foreign_keys_values (dict): precomputed foreign keys index (see `resource.iter`)
+            memory_limit (int):
+                size in bytes for a foreign keys index to be moved to disk (SQLite)
+                (`config.RELATIONS_MEMORY_LIMIT` by default, `None` is unlimited)
 
         # Raises
             exceptions.RelationError: raises if there are relation issues
@@ -419,8 +472,75 @@ class Resource(object):
             bool: returns True if no issues
 
         """
-        for row in self.iter(relations=True, foreign_keys_values=foreign_keys_values):
-            pass
+
+        # Error for non tabular
+        if not self.tabular:
+            message = 'Methods iter/read are not supported for non tabular data'
+            raise exceptions.DataPackageException(message)
+
+        # Get relations
+        schema = self.__get_table().schema
+        foreign_keys = schema.foreign_keys if schema else []
+        if not foreign_keys:
+            return True
+        single_pass = not foreign_keys_values
+        if single_pass:
+            foreign_keys_values = self.__get_relations(memory_limit=memory_limit, resolve=False,
+                foreign_keys=[fk for fk in foreign_keys if fk['reference']['resource']])
+
+        # Check keys
+        checks = []
+        self_indexes = {}
+        self_getters = []
+        for row_number, headers, row in self.__get_table().iter(extended=True, cast=False):
+            if not checks:
+                for fk in foreign_keys:
+                    fields = tuple(fk['reference']['fields'])
+                    get_key = create_key_getter(fk['fields'], headers,
+                        schema=schema, resource=self.name)
+                    pending = None
+                    if single_pass and not fk['reference']['resource']:
+                        if fields not in self_indexes:
+                            self_indexes[fields] = ForeignKeyIndex(
+                                fields, memory_limit=memory_limit)
+                            self_getters.append((self_indexes[fields], create_key_getter(
+                                fields, headers, schema=schema, resource=self.name)))
+                        index = self_indexes[fields]
+                        # Unresolved self references are deferred to the end of the pass
+                        pending = OrderedDict()
+                    else:
+                        index = foreign_keys_values[fk['reference']['resource']][fields]
+                    checks.append((fk, get_key, index, pending))
+            for index, get_key in self_getters:
+                index.add(get_key(row))
+            for fk, get_key, index, pending in checks:
+                key = get_key(row)
+                if set(key) == {None} or key in index:
+                    continue
+                if pending is not None:
+                    try:
+                        pending.setdefault(key, row_number)
+                        continue
+                    except TypeError:
+                        pass
+                _raise_unresolved_foreign_key(fk, row_number, key)
+
+        # Check pending
+        unresolved = []
+        for fk, get_key, index, pending in checks:
+            for key, row_number in (pending or {}).items():
+                if key not in index:
+                    unresolved.append((row_number, key, fk))
+                    break
+        if unresolved:
+            row_number, key, fk = min(unresolved, key=lambda item: item[0])
+            _raise_unresolved_foreign_key(fk, row_number, key)
+
+        # Share complete self indexes
+        if self.name:
+            for fields, index in self_indexes.items():
+                self.__relations_cache.set((self.name, fields, False), index)
+
         return True
 
     def drop_relations(self):
@@ -429,13 +549,14 @@ class Resource(object):
         > Only for tabular resources
 
         Remove relations data from memory
+        (foreign key indexes are shared by the package's resources)
 
         # Returns
             bool: returns True
 
         """
-        self.__relations = False
-        return self.__relations is False
+        self.__relations_cache.clear()
+        return True
 
     def raw_iter(self, stream=False):
         """Iterate over data chunks as bytes.
@@ -457,17 +578,12 @@ class Resource(object):
 
         # Get filelike
         if self.multipart:
-            filelike = _MultipartSource(self)
+            filelike = _MultipartSource(self, self.__get_http_session(), self.__archive)
         elif self.remote:
-            if self.__table_options.get('http_session'):
-                http_session = self.__table_options['http_session']
-            else:
-                http_session = requests.Session()
-                http_session.headers = config.HTTP_HEADERS
-            res = http_session.get(self.source, stream=True)
+            res = self.__get_http_session().get(self.source, stream=True)
             filelike = res.raw
         else:
-            filelike = io.open(self.source, 'rb')
+            filelike = _open_local(self.source, self.__archive)
 
         return filelike
 
@@ -484,13 +600,17 @@ class Resource(object):
                 contents += chunk
         return contents
 
-    def infer(self, **options):
+    def infer(self, integrity=False, **options):
         """Infer resource metadata
 
         Like name, format, mediatype, encoding, schema and profile.
         It commits this changes into resource instance.
 
         # Arguments
+            integrity (bool):
+                if true size in BYTES and SHA256 hash of the file will be
+                inferred as `bytes` and `hash` reading the file to the end
+                in the same pass used for the encoding detection
             options:
                 options will be passed to `tableschema.infer` call,
                 for more control on results (e.g. for setting `limit`, `confidence` etc.).
@@ -499,7 +619,7 @@ class Resource(object):
             dict: returns resource descriptor
 
         """
-        descriptor = deepcopy(self.__current_descriptor)
+        descriptor = helpers.copy_descriptor(self.__current_descriptor)
 
         # Blank -> Stop
         if self.__source_inspection.get('blank'):
@@ -520,17 +640,40 @@ class Resource(object):
             if not descriptor.get('mediatype'):
                 descriptor['mediatype'] = 'text/%s' % descriptor['format']
 
-            # Encoding
-            if not descriptor.get('encoding'):
+            # Encoding/Bytes/Hash
+            infer_encoding = not descriptor.get('encoding')
+            infer_integrity = integrity and not self.multipart and not (
+                descriptor.get('bytes') and descriptor.get('hash'))
+            if infer_encoding or infer_integrity:
                 contents = b''
-                with self.raw_iter(stream=True) as stream:
-                    for chunk in stream:
-                        contents += chunk
-                        if len(contents) > 1000: break
-                encoding = detect(contents)['encoding']
-                if encoding is not None:
-                    encoding = encoding.lower()
-                    descriptor['encoding'] = 'utf-8' if encoding == 'ascii' else encoding
+                sampled = False
+                size = 0
+                hasher = hashlib.sha256()
+                chunks = self.__iter_raw_chunks()
+                try:
+                    for chunk in chunks:
+                        # Sample lines till the one exceeding 1000 bytes
+                        if not sampled:
+                            contents += chunk[:_ENCODING_SAMPLE_LIMIT - len(contents)]
+                            end = contents.find(b'\n', 1000)
+                            if end != -1:
+                                contents = contents[:end + 1]
+                            sampled = end != -1 or len(contents) >= _ENCODING_SAMPLE_LIMIT
+                            if sampled and not infer_integrity:
+                                break
+                        if infer_integrity:
+                            size += len(chunk)
+                            hasher.update(chunk)
+                finally:
+                    chunks.close()
+                if infer_encoding:
+                    encoding = detect(contents)['encoding']
+                    if encoding is not None:
+                        encoding = encoding.lower()
+                        descriptor['encoding'] = 'utf-8' if encoding == 'ascii' else encoding
+                if infer_integrity:
+                    descriptor.setdefault('bytes', size)
+                    descriptor.setdefault('hash', 'sha256:%s' % hasher.hexdigest())
 
         # Schema
         if not descriptor.get('schema'):
@@ -563,9 +706,12 @@ class Resource(object):
         """
         if strict is not None:
             self.__strict = strict
+        elif self.__next_descriptor is None:
+            return False
         elif self.__current_descriptor == self.__next_descriptor:
             return False
-        self.__current_descriptor = deepcopy(self.__next_descriptor)
+        if self.__next_descriptor is not None:
+            self.__current_descriptor = deepcopy(self.__next_descriptor)
         self.__table = None
         self.__build()
         return True
@@ -625,7 +771,7 @@ class Resource(object):
         # Process descriptor
         expand = helpers.expand_resource_descriptor
         self.__current_descriptor = expand(self.__current_descriptor)
-        self.__next_descriptor = deepcopy(self.__current_descriptor)
+        self.__next_descriptor = None
 
         # Inspect source
         self.__source_inspection = _inspect_source(
@@ -636,17 +782,26 @@ class Resource(object):
             storage=self.__storage)
 
         # Instantiate profile
-        self.__profile = Profile(self.__current_descriptor.get('profile'))
+        self.__profile = Profile(self.__current_descriptor.get('profile'),
+            http_session=self.__table_options.get('http_session'))
 
-        # Validate descriptor
+        # Validate descriptor (a package passes errors it has already collected)
+        validation_errors = self.__validation_errors
+        self.__validation_errors = None
         try:
-            self.__profile.validate(self.__current_descriptor)
+            if validation_errors is not None:
+                self.__profile._validate_errors(validation_errors, fail_fast=self.__strict)
+            else:
+                self.__profile.validate(self.__current_descriptor, fail_fast=self.__strict)
             self.__errors = []
         except exceptions.ValidationError as exception:
             self.__errors = exception.errors
             if self.__strict:
                 raise exception
 
+    def __get_http_session(self):
+        return helpers.get_http_session(self.__table_options.get('http_session'))
+
     def __get_table(self):
         if not self.__table:
 
@@ -656,8 +811,13 @@ class Resource(object):
 
             # Get source/schema
             source = self.source
+            member = None
             if self.multipart:
-                source = _MultipartSource(self)
+                source = _MultipartSource(self, self.__get_http_session(), self.__archive)
+            elif self.local and self.__archive is not None:
+                member = self.__archive.get_member(source)
+                if member is not None:
+                    source = _ArchiveSource(self.__archive, member)
             schema = self.__current_descriptor.get('schema')
 
             # Storage resource
@@ -668,6 +828,8 @@ class Resource(object):
             else:
                 options = self.__table_options
                 descriptor = self.__current_descriptor
+                if self.remote and not self.multipart:
+                    options['http_session'] = self.__get_http_session()
                 # TODO: this option is experimental
                 options['scheme'] = descriptor.get('scheme')
                 options['format'] = descriptor.get('format', 'csv')
@@ -677,6 +839,11 @@ class Resource(object):
                     options['encoding'] = descriptor['encoding']
                 if descriptor.get('compression'):
                     options['compression'] = descriptor['compression']
+                elif member is not None:
+                    # Streams have no extension to detect compression from
+                    extension = posixpath.splitext(member)[1][1:].lower()
+                    if extension in _COMPRESSION_EXTENSIONS:
+                        options['compression'] = extension
                 # TODO: these options are experimental
                 options['pick_fields'] = descriptor.get(
                     'pickFields', options.get('pick_fields', None))
@@ -703,38 +870,72 @@ class Resource(object):
 
         return self.__table
 
+    def __iter_raw_chunks(self):
+
+        # Multipart
+        if self.multipart:
+            source = _MultipartSource(self, self.__get_http_session(), self.__archive)
+            for chunk in iter(lambda: source.read(_RAW_CHUNK_SIZE), b''):
+                yield chunk
+
+        # Remote
+        elif self.remote:
+            response = self.__get_http_session().get(self.source, stream=True)
+            try:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=_RAW_CHUNK_SIZE):
+                    yield chunk
+            finally:
+                response.close()
+
+        # Archive member
+        elif self.__archive is not None and self.__archive.get_member(self.source):
+            with _open_local(self.source, self.__archive) as file:
+                for chunk in iter(lambda: file.read(_RAW_CHUNK_SIZE), b''):
+                    yield chunk
+
+        # Local (memory-mapped as a whole)
+        else:
+            with io.open(self.source, 'rb') as file:
+                try:
+                    mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty files can't be mapped
+                    return
+                try:
+                    yield mapping
+                finally:
+                    mapping.close()
+
     def __get_integrity(self):
         return {
             'size': self.__current_descriptor.get('bytes'),
             'hash': helpers.extract_sha256_hash(self.__current_descriptor.get('hash')),
         }
 
-    def __get_relations(self):
-        if not self.__relations:
-
-            # Prepare resources
-            resources = {}
+    def __get_relations(self, memory_limit=None, resolve=True, foreign_keys=None):
+        if foreign_keys is None:
+            foreign_keys = []
             if self.__get_table() and self.__get_table().schema:
-                for fk in self.__get_table().schema.foreign_keys:
-                    resources.setdefault(fk['reference']['resource'], [])
-                    for field in fk['reference']['fields']:
-                        resources[fk['reference']['resource']].append(field)
-
-            # Fill relations
-            self.__relations = {}
-            for resource, fields in resources.items():
-                if resource and not self.__package:
-                    continue
-                self.__relations.setdefault(resource, [])
-                data = self.__package.get_resource(resource) if resource else self
-                if data.tabular:
-                    self.__relations[resource] = data.read(keyed=True)
-
-        return self.__relations
+                foreign_keys = self.__get_table().schema.foreign_keys
+        return index_foreign_keys(foreign_keys, self.__get_relation_resource,
+            resolve=resolve, memory_limit=memory_limit, cache=self.__relations_cache,
+            get_cache_name=self.__get_relation_cache_name)
+
+    def __get_relation_cache_name(self, name):
+        # Self reference is cached by the resource's name
+        return name or self.name
+
+    def __get_relation_resource(self, name):
+        if not name:
+            return self
+        if not self.__package:
+            return None
+        return self.__package.get_resource(name)
 
-    def get_foreign_keys_values(self):
+    def get_foreign_keys_values(self, memory_limit=None, resolve=True):
         # need to access it from groups for optimization
-        return self.__get_table().index_foreign_keys_values(self.__get_relations())
+        return self.__get_relations(memory_limit=memory_limit, resolve=resolve)
 
     # Deprecated
 
@@ -775,6 +976,15 @@ _DIALECT_KEYS = [
     'escapeChar',
     'skipInitialSpace',
 ]
+_COMPRESSION_EXTENSIONS = ['zip', 'gz']
+_RAW_CHUNK_SIZE = 1024 * 1024
+_ENCODING_SAMPLE_LIMIT = 64 * 1024
+
+
+def _raise_unresolved_foreign_key(fk, row_number, key):
+    message = 'Foreign key "%s" violation in row "%s": %s not found in %s'
+    message = message % (fk['fields'], row_number, key, fk['reference']['resource'])
+    raise exceptions.UnresolvedFKError(message)
 
 
 def _inspect_source(data, path, base_path=None, unsafe=False, storage=None):
@@ -851,7 +1061,7 @@ class _MultipartSource(object):
 
     # Public
 
-    def __init__(self, resource):
+    def __init__(self, resource, http_session, archive=None):
         # testing if we have headers
         if resource.tabular \
            and (resource.descriptor.get('dialect') and resource.descriptor.get('dialect').get('header')
@@ -861,6 +1071,8 @@ class _MultipartSource(object):
             remove_chunk_header_row = False
         self.__source = resource.source
         self.__remote = resource.remote
+        self.__http_session = http_session
+        self.__archive = archive
         self.__remove_chunk_header_row = remove_chunk_header_row
         self.__rows = self.__iter_rows()
 
@@ -915,9 +1127,9 @@ class _MultipartSource(object):
     def __iter_rows(self):
         streams = []
         if self.__remote:
-            streams = (urlopen(chunk) for chunk in self.__source)
+            streams = (_iter_remote_lines(chunk, self.__http_session) for chunk in self.__source)
         else:
-            streams = (io.open(chunk, 'rb') for chunk in self.__source)
+            streams = (_open_local(chunk, self.__archive) for chunk in self.__source)
         firstStream = True
         header_row = None
         for stream, chunk in zip(streams, self.__source):
@@ -945,3 +1157,82 @@ class _MultipartSource(object):
                     yield row
                 firstRow = False
             firstStream = False
+
+
+class _ArchiveSource(object):
+    """Re-openable file-like source reading a zip archive member
+    """
+
+    # Public
+
+    def __init__(self, archive, member):
+        self.__archive = archive
+        self.__member = member
+        self.__file = archive.open(member)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        pass
+
+    def __iter__(self):
+        return iter(self.__file)
+
+    @property
+    def closed(self):
+        return False
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def close(self):
+        # Table closes its source on every reading
+        pass
+
+    def flush(self):
+        pass
+
+    def read1(self, size):
+        return self.read(size)
+
+    def seek(self, offset):
+        assert offset == 0
+        self.__file.close()
+        self.__file = self.__archive.open(self.__member)
+
+    def read(self, size=-1):
+        return self.__file.read(size)
+
+
+def _open_local(path, archive=None):
+    """Open local file or zip archive member (if the path is a member)
+    """
+    member = archive.get_member(path) if archive is not None else None
+    if member is not None:
+        return archive.open(member)
+    return io.open(path, 'rb')
+
+
+def _iter_remote_lines(url, http_session, chunk_size=64 * 1024):
+    """Iterate lines (with line endings) of a remote file using pooled session
+    """
+    response = http_session.get(url, stream=True)
+    try:
+        response.raise_for_status()
+        buffer = b''
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            lines = (buffer + chunk).split(b'\n')
+            buffer = lines.pop()
+            for line in lines:
+                yield line + b'\n'
+        if buffer:
+            yield buffer
+    finally:
+        response.close()
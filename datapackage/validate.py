@@ -19,7 +19,7 @@ def validate(descriptor):
           - object
 
     # Raises
-        ValidationError: raises on invalid
+        ValidationError: raises on invalid (with the first error only)
 
     # Returns
         bool: returns true on valid
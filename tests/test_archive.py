@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import zipfile
+import pytest
+from datapackage.archive import Archive
+
+
+# Tests
+
+def test_archive_get_member(zip_path):
+    with Archive(zip_path) as archive:
+        assert archive.root == os.path.abspath(zip_path)
+        assert archive.get_member(os.path.join(archive.root, 'stored.csv')) == 'stored.csv'
+        assert archive.get_member(os.path.join(archive.root, 'data', '..', 'stored.csv')) == 'stored.csv'
+        assert archive.get_member(os.path.join(archive.root, 'missing.csv')) is None
+        assert archive.get_member('stored.csv') is None
+
+
+@pytest.mark.parametrize('name', ['stored.csv', 'deflated.csv'])
+def test_archive_open(zip_path, name):
+    with Archive(zip_path) as archive:
+        with archive.open(name) as file:
+            assert file.read(3) == b'id\n'
+            file.seek(0)
+            assert file.read() == b'id\n1\n2\n'
+        assert archive.read(name) == b'id\n1\n2\n'
+
+
+def test_archive_open_stored_member_is_memory_mapped(zip_path):
+    with Archive(zip_path) as archive:
+        assert not isinstance(archive.open('stored.csv'), zipfile.ZipExtFile)
+        assert isinstance(archive.open('deflated.csv'), zipfile.ZipExtFile)
+
+
+def test_archive_file_like_source(zip_path):
+    with io.open(zip_path, 'rb') as source:
+        archive = Archive(source)
+        assert archive.root == '<zip>'
+        assert archive.read('stored.csv') == b'id\n1\n2\n'
+        archive.close()
+        assert archive.closed
+        assert not source.closed
+
+
+# Fixtures
+
+@pytest.fixture
+def zip_path(tmpdir):
+    path = str(tmpdir.join('package.zip'))
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('stored.csv', 'id\n1\n2\n', zipfile.ZIP_STORED)
+        z.writestr('deflated.csv', 'id\n1\n2\n', zipfile.ZIP_DEFLATED)
+    return path
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import json
+import mock
+import zipfile
+import pytest
+from datapackage import Package
+from datapackage.extraction import ExtractionCache
+
+
+# Tests
+
+def test_extraction_cache_reuses_tree(zip_path, tmpdir):
+    cache = ExtractionCache(str(tmpdir.join('cache')))
+    with zipfile.ZipFile(zip_path) as z:
+        path1 = cache.extract(z, cache.get_key(zip_path))
+    with zipfile.ZipFile(zip_path) as z:
+        z.extractall = None
+        path2 = cache.extract(z, cache.get_key(zip_path))
+    assert path1 == path2
+    assert os.listdir(cache.directory) == [os.path.basename(path1)]
+    assert sorted(os.listdir(path1)) == ['data.csv', 'datapackage.json']
+
+
+def test_extraction_cache_key(zip_path, tmpdir):
+    cache = ExtractionCache(str(tmpdir.join('cache')))
+    with io.open(zip_path, 'rb') as file:
+        key = cache.get_key(file)
+        assert file.tell() == 0
+        assert cache.get_key(io.BytesIO(file.read())) == key
+    assert cache.get_key(zip_path) != key
+    path_key = cache.get_key(zip_path)
+    assert cache.get_key(zip_path) == path_key
+    os.utime(zip_path, (0, 0))
+    assert cache.get_key(zip_path) != path_key
+
+
+def test_extraction_cache_concurrent_extraction(zip_path, tmpdir):
+    cache = ExtractionCache(str(tmpdir.join('cache')))
+    key = cache.get_key(zip_path)
+    path = os.path.join(cache.directory, key)
+
+    # Another process finishes extraction of the same archive first
+    class Zip(object):
+        def extractall(self, target):
+            with zipfile.ZipFile(zip_path) as z:
+                z.extractall(target)
+                z.extractall(path)
+
+    assert cache.extract(Zip(), key) == path
+    assert os.listdir(cache.directory) == [key]
+    assert sorted(os.listdir(path)) == ['data.csv', 'datapackage.json']
+
+
+def test_extraction_cache_evicts_least_recently_used(zip_path, tmpdir):
+    cache = ExtractionCache(str(tmpdir.join('cache')), max_size=1)
+    with zipfile.ZipFile(zip_path) as z:
+        path1 = cache.extract(z, 'key1')
+        os.utime(path1, (0, 0))
+        path2 = cache.extract(z, 'key2')
+    assert not os.path.exists(path1)
+    assert os.path.exists(path2)
+    cache.clear()
+    assert os.listdir(cache.directory) == []
+
+
+def test_extraction_cache_doesnt_evict_leased_entries(zip_path, tmpdir):
+    cache = ExtractionCache(str(tmpdir.join('cache')), max_size=1)
+    with zipfile.ZipFile(zip_path) as z:
+        lease = cache.lease('key1')
+        path1 = cache.extract(z, 'key1')
+        os.utime(path1, (0, 0))
+        path2 = cache.extract(z, 'key2')
+        assert os.path.exists(path1)
+        cache.clear()
+        assert os.path.exists(path1)
+        lease.release()
+        lease.release()
+        path3 = cache.extract(z, 'key3')
+    assert not os.path.exists(path1)
+    assert not os.path.exists(path2)
+    assert os.listdir(cache.directory) == [os.path.basename(path3)]
+
+
+def test_extraction_cache_doesnt_evict_recently_leased_entries_without_fcntl(zip_path, tmpdir):
+    cache = ExtractionCache(str(tmpdir.join('cache')), max_size=1)
+    with mock.patch('datapackage.extraction.fcntl', None):
+        with zipfile.ZipFile(zip_path) as z:
+            path1 = cache.extract(z, 'key1')
+            cache.lease('key2').release()
+            path2 = cache.extract(z, 'key2')
+            os.utime(path2, (0, 0))
+            path3 = cache.extract(z, 'key3')
+    assert not os.path.exists(path1)
+    assert os.path.exists(path2)
+    assert os.path.exists(path3)
+
+
+def test_extraction_cache_package_evicts_only_closed_packages(zip_path, tmpdir):
+    cache = ExtractionCache(str(tmpdir.join('cache')), max_size=1)
+    other_zip_path = str(tmpdir.join('other.zip'))
+    descriptor = {'name': 'other', 'resources': [{'name': 'name', 'path': 'data.csv'}]}
+    with zipfile.ZipFile(other_zip_path, 'w') as z:
+        z.writestr('datapackage.json', json.dumps(descriptor))
+        z.writestr('data.csv', 'id\n2\n')
+    package1 = Package(zip_path, extraction_cache=cache)
+    package2 = Package(other_zip_path, extraction_cache=cache)
+    assert package1.get_resource('name').read() == [['1']]
+    assert package2.get_resource('name').read() == [['2']]
+    cache.clear()
+    assert len(os.listdir(cache.directory)) == 4
+    package1.close()
+    cache.clear()
+    assert not os.path.exists(package1.base_path)
+    assert package2.get_resource('name').read() == [['2']]
+    package2.close()
+    cache.clear()
+    assert os.listdir(cache.directory) == []
+
+
+def test_extraction_cache_package(zip_path, tmpdir):
+    cache = ExtractionCache(str(tmpdir.join('cache')))
+    package1 = Package(zip_path, extraction_cache=cache)
+    package2 = Package(zip_path, extraction_cache=cache)
+    assert package1.base_path == package2.base_path
+    assert package1.base_path.startswith(cache.directory)
+    package1.close()
+    assert package2.get_resource('name').read() == [['1']]
+
+
+# Fixtures
+
+@pytest.fixture
+def zip_path(tmpdir):
+    path = str(tmpdir.join('package.zip'))
+    descriptor = {'name': 'name', 'resources': [{'name': 'name', 'path': 'data.csv'}]}
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('datapackage.json', json.dumps(descriptor))
+        z.writestr('data.csv', 'id\n1\n')
+    return path
@@ -7,8 +7,13 @@ from __future__ import unicode_literals
 import os
 import shutil
 import tempfile
+import mock
+import pickle
 import pytest
+import requests
+import httpretty
 import datapackage.helpers as helpers
+from datapackage.httpcache import HTTPCache
 
 
 # Tests
@@ -49,3 +54,54 @@ def test_expand_resource_descriptor_doesnt_add_default_encoding():
     expanded_descriptor = helpers.expand_resource_descriptor(descriptor)
 
     assert 'encoding' not in descriptor
+
+
+def test_copy_descriptor_shares_inline_data():
+    descriptor = {'resources': [{'name': 'name', 'data': [['id'], ['1']]}]}
+    copied_descriptor = helpers.copy_descriptor(descriptor)
+    assert copied_descriptor == descriptor
+    assert copied_descriptor['resources'][0] is not descriptor['resources'][0]
+    assert copied_descriptor['resources'][0]['data'] is descriptor['resources'][0]['data']
+
+
+def test_get_http_session_is_shared():
+    assert helpers.get_http_session() is helpers.get_http_session()
+
+
+def test_get_http_session_returns_given_session():
+    http_session = requests.Session()
+    assert helpers.get_http_session(http_session) is http_session
+
+
+def test_create_http_session():
+    http_session = helpers.create_http_session(pool_size=3, timeout=5, retries=2)
+    adapter = http_session.get_adapter('https://example.com')
+    assert adapter.timeout == 5
+    assert adapter.max_retries.total == 2
+    assert adapter._pool_maxsize == 3
+    assert 'User-Agent' in http_session.headers
+
+
+@httpretty.activate
+def test_create_http_session_can_be_pickled(tmpdir):
+    httpretty.register_uri(httpretty.GET, 'http://example.com/data', body='{}')
+    http_session = helpers.create_http_session(timeout=5, cache=HTTPCache(str(tmpdir)))
+    http_session = pickle.loads(pickle.dumps(http_session))
+    adapter = http_session.get_adapter('http://example.com')
+    assert adapter.timeout == 5
+    assert adapter.cache.directory == str(tmpdir)
+    assert http_session.get('http://example.com/data').json() == {}
+    assert len(tmpdir.listdir()) == 1
+
+
+def test_create_http_session_with_old_urllib3():
+    Retry = helpers.Retry
+
+    def OldRetry(raise_on_status=None, **options):
+        if raise_on_status is not None:
+            raise TypeError('unexpected keyword argument')
+        return Retry(**options)
+
+    with mock.patch('datapackage.helpers.Retry', OldRetry):
+        session = helpers.create_http_session(retries=3)
+    assert session.get_adapter('http://example.com').max_retries.total == 3
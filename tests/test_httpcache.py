@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import json
+import pytest
+import threading
+from six.moves import BaseHTTPServer
+from datapackage import Package, helpers
+from datapackage.httpcache import HTTPCache
+
+
+# Fixtures
+
+@pytest.yield_fixture()
+def server():
+    files = {}
+    requests = []
+
+    class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append((self.path, dict(self.headers)))
+            body, etag, headers = files[self.path]
+            if etag and self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if etag:
+                self.send_header('ETag', etag)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.01})
+    thread.daemon = True
+    thread.start()
+    try:
+        url = 'http://127.0.0.1:%s' % httpd.server_address[1]
+
+        def serve(path, body, etag=None, headers={}):
+            files[path] = (json.dumps(body).encode('utf-8'), etag, headers)
+            return url + path
+
+        yield serve, requests
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+# Tests
+
+def test_http_cache_fresh_entry(server, tmpdir):
+    serve, requests = server
+    url = serve('/datapackage.json', {'resources': []})
+    session = helpers.create_http_session(cache=HTTPCache(str(tmpdir)))
+    assert session.get(url).json() == {'resources': []}
+    assert session.get(url).json() == {'resources': []}
+    assert len(requests) == 1
+
+
+def test_http_cache_shared_between_sessions(server, tmpdir):
+    serve, requests = server
+    url = serve('/datapackage.json', {'resources': []})
+    helpers.create_http_session(cache=HTTPCache(str(tmpdir))).get(url)
+    response = helpers.create_http_session(cache=HTTPCache(str(tmpdir))).get(url)
+    assert response.json() == {'resources': []}
+    assert len(requests) == 1
+
+
+def test_http_cache_revalidation_not_modified(server, tmpdir):
+    serve, requests = server
+    url = serve('/datapackage.json', {'resources': []}, etag='"v1"')
+    session = helpers.create_http_session(cache=HTTPCache(str(tmpdir), ttl=0))
+    session.get(url)
+    response = session.get(url)
+    assert response.status_code == 200
+    assert response.json() == {'resources': []}
+    assert len(requests) == 2
+    assert requests[1][1].get('If-None-Match') == '"v1"'
+
+
+def test_http_cache_revalidation_modified(server, tmpdir):
+    serve, requests = server
+    url = serve('/datapackage.json', {'resources': []}, etag='"v1"')
+    session = helpers.create_http_session(cache=HTTPCache(str(tmpdir), ttl=0))
+    session.get(url)
+    serve('/datapackage.json', {'name': 'name', 'resources': []}, etag='"v2"')
+    assert session.get(url).json() == {'name': 'name', 'resources': []}
+    assert session.get(url).json() == {'name': 'name', 'resources': []}
+    assert len(requests) == 3
+
+
+def test_http_cache_no_store(server, tmpdir):
+    serve, requests = server
+    url = serve('/datapackage.json', {'resources': []}, headers={'Cache-Control': 'no-store'})
+    session = helpers.create_http_session(cache=HTTPCache(str(tmpdir)))
+    session.get(url)
+    session.get(url)
+    assert len(requests) == 2
+    assert tmpdir.listdir() == []
+
+
+def test_http_cache_private(server, tmpdir):
+    serve, requests = server
+    url = serve('/datapackage.json', {'resources': []},
+        headers={'Cache-Control': 'private, max-age=60'})
+    session = helpers.create_http_session(cache=HTTPCache(str(tmpdir)))
+    session.get(url)
+    session.get(url)
+    assert len(requests) == 2
+    assert tmpdir.listdir() == []
+
+
+@pytest.mark.parametrize('headers', [
+    {'Authorization': 'Bearer token'},
+    {'Cookie': 'session=secret'},
+])
+def test_http_cache_requests_with_credentials_are_not_cached(server, tmpdir, headers):
+    serve, requests = server
+    url = serve('/datapackage.json', {'resources': []})
+    session = helpers.create_http_session(cache=HTTPCache(str(tmpdir)))
+    session.get(url, headers=headers)
+    assert tmpdir.listdir() == []
+    session.get(url)
+    session.get(url, headers=headers)
+    assert len(requests) == 3
+    assert requests[2][1].get(list(headers)[0]) == list(headers.values())[0]
+
+
+def test_http_cache_streamed_requests_are_not_cached(server, tmpdir):
+    serve, requests = server
+    url = serve('/data.json', {'data': []})
+    session = helpers.create_http_session(cache=HTTPCache(str(tmpdir)))
+    session.get(url, stream=True).close()
+    session.get(url, stream=True).close()
+    assert len(requests) == 2
+
+
+def test_http_cache_evicts_least_recently_used(server, tmpdir):
+    serve, requests = server
+    url1 = serve('/schema1.json', {'fields': [{'name': 'id1'}]})
+    url2 = serve('/schema2.json', {'fields': [{'name': 'id2'}]})
+    url3 = serve('/schema3.json', {'fields': [{'name': 'id3'}]})
+    helpers.create_http_session(cache=HTTPCache(str(tmpdir))).get(url1)
+    entry = tmpdir.listdir()[0].strpath
+    os.utime(entry, (0, 0))
+    cache = HTTPCache(str(tmpdir), max_size=os.path.getsize(entry) * 2 + 10)
+    session = helpers.create_http_session(cache=cache)
+    session.get(url2)
+    session.get(url3)
+    assert len(tmpdir.listdir()) == 2
+    assert not os.path.exists(entry)
+    session.get(url1)
+    assert len(requests) == 4
+    cache.clear()
+    assert tmpdir.listdir() == []
+
+
+def test_http_cache_package(server, tmpdir):
+    serve, requests = server
+    schema_url = serve('/schema.json', {'fields': [{'name': 'id', 'type': 'integer'}]})
+    url = serve('/datapackage.json', {'resources': [
+        {'name': 'name', 'data': [['id'], [1]], 'schema': schema_url},
+    ]})
+    session = helpers.create_http_session(cache=HTTPCache(str(tmpdir)))
+    package1 = Package(url, http_session=session)
+    package2 = Package(url, http_session=session)
+    assert package1.descriptor == package2.descriptor
+    assert package2.descriptor['resources'][0]['schema']['fields'][0]['name'] == 'id'
+    assert sorted(path for path, _ in requests) == ['/datapackage.json', '/schema.json']
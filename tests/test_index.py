@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import mock
+import pytest
+from decimal import Decimal
+from datapackage import Package, Resource, exceptions
+from datapackage.index import ForeignKeyIndex, ForeignKeyIndexCache, index_foreign_keys
+
+
+# Tests
+
+def test_foreign_key_index():
+    index = ForeignKeyIndex(['id'], headers=['id', 'name'])
+    index.add((1,), [1, 'first'])
+    index.add((2,), [2, 'second'])
+    index.add((1,), [1, 'duplicate'])
+    assert len(index) == 2
+    assert (1,) in index
+    assert (3,) not in index
+    assert ([],) not in index
+    assert index[(1,)] == {'id': 1, 'name': 'first'}
+    assert index[(1,)] is not index[(1,)]
+    assert sorted(index) == [(1,), (2,)]
+    assert index.resolves
+
+
+def test_foreign_key_index_multi_field():
+    index = ForeignKeyIndex(['name', 'surname'], headers=['name', 'surname'])
+    index.add(('Alex', 'Martin'), ['Alex', 'Martin'])
+    assert ('Alex', 'Martin') in index
+    assert ('Alex', 'White') not in index
+    assert index[('Alex', 'Martin')] == {'name': 'Alex', 'surname': 'Martin'}
+    assert list(index) == [('Alex', 'Martin')]
+
+
+def test_foreign_key_index_keys_only():
+    index = ForeignKeyIndex(['id'])
+    index.add((1,))
+    assert (1,) in index
+    assert index[(1,)] is True
+    assert not index.resolves
+    with pytest.raises(KeyError):
+        index[(2,)]
+
+
+@pytest.mark.parametrize('headers', [None, ['id', 'name']])
+def test_foreign_key_index_on_disk(headers):
+    index = ForeignKeyIndex(['id'], headers=headers, memory_limit=1)
+    index.add((1,), [1, 'first'])
+    assert index.on_disk
+    index.add((Decimal('2.0'),), [Decimal('2.0'), 'second'])
+    index.add((1,), [1, 'duplicate'])
+    assert len(index) == 2
+    assert (1,) in index
+    assert (1.0,) in index
+    assert (2,) in index
+    assert ('1',) not in index
+    assert ([],) not in index
+    assert sorted(index) == [(1,), (Decimal('2.0'),)]
+    if headers:
+        assert index[(1,)] == {'id': 1, 'name': 'first'}
+    else:
+        assert index[(1,)] is True
+    with pytest.raises(KeyError):
+        index[(3,)]
+    index.close()
+    assert len(index) == 0
+
+
+def test_foreign_key_index_on_disk_long_numbers():
+    index = ForeignKeyIndex(['id'], memory_limit=1)
+    index.add((10 ** 30,))
+    index.add((Decimal('0.1000000000000000000000000000001'),))
+    assert (10 ** 30,) in index
+    assert (Decimal('1E+30'),) in index
+    assert (10 ** 30 + 1,) not in index
+    assert (Decimal('0.10000000000000000000000000000010'),) in index
+    assert (Decimal('0.1000000000000000000000000000002'),) not in index
+    assert (Decimal('0.1'),) not in index
+
+
+def test_package_check_relations_long_numbers_on_disk():
+    package = Package({'resources': [
+        {'name': 'fact', 'data': [['id', 'dim'], ['1', str(10 ** 30 + 1)]], 'schema': {
+            'fields': [{'name': 'id'}, {'name': 'dim', 'type': 'integer'}],
+            'foreignKeys': [{'fields': 'dim', 'reference': {'resource': 'dim', 'fields': 'id'}}],
+        }},
+        {'name': 'dim', 'data': [['id'], [str(10 ** 30)]], 'schema': {
+            'fields': [{'name': 'id', 'type': 'integer'}]}},
+    ]})
+    with pytest.raises(exceptions.UnresolvedFKError):
+        package.get_resource('fact').check_relations(memory_limit=1)
+
+
+@pytest.mark.parametrize('memory_limit', [None, 1])
+def test_foreign_key_index_booleans_equal_numbers(memory_limit):
+    index = ForeignKeyIndex(['id'], memory_limit=memory_limit)
+    index.add((1,))
+    index.add((False,))
+    assert (True,) in index
+    assert (0,) in index
+    assert (0.0,) in index
+    assert (2,) not in index
+    assert len(index) == 2
+
+
+def test_foreign_key_index_on_disk_multi_field():
+    index = ForeignKeyIndex(['name', 'surname'], headers=['name', 'surname'], memory_limit=1)
+    index.add(('Alex', 'Martin'), ['Alex', 'Martin'])
+    index.add(('Alex,', 'Martin'), ['Alex,', 'Martin'])
+    assert ('Alex', 'Martin') in index
+    assert ('Alex', ',Martin') not in index
+    assert index[('Alex,', 'Martin')] == {'name': 'Alex,', 'surname': 'Martin'}
+
+
+def test_index_foreign_keys_reads_resource_once():
+    resource = Resource({'name': 'people', 'data': [
+        ['id', 'name', 'surname'],
+        ['1', 'Alex', 'Martin'],
+        ['2', 'John', 'Dockins'],
+    ]})
+    foreign_keys = [
+        {'fields': ['person'], 'reference': {'resource': 'people', 'fields': ['id']}},
+        {'fields': ['name', 'surname'],
+            'reference': {'resource': 'people', 'fields': ['name', 'surname']}},
+    ]
+    with mock.patch.object(Resource, 'iter', wraps=resource.iter) as iter_mock:
+        foreign_keys_values = index_foreign_keys(foreign_keys, lambda name: resource)
+        assert iter_mock.call_count == 1
+    assert ('2',) in foreign_keys_values['people'][('id',)]
+    assert ('John', 'Dockins') in foreign_keys_values['people'][('name', 'surname')]
+    assert foreign_keys_values['people'][('id',)][('1',)] == {
+        'id': '1', 'name': 'Alex', 'surname': 'Martin'}
+
+
+def test_index_foreign_keys_not_resolved():
+    resource = Resource({'name': 'people', 'data': [['id', 'name'], ['1', 'Alex']]})
+    foreign_keys = [{'fields': ['person'], 'reference': {'resource': 'people', 'fields': ['id']}}]
+    foreign_keys_values = index_foreign_keys(foreign_keys, lambda name: resource, resolve=False)
+    assert foreign_keys_values['people'][('id',)][('1',)] is True
+
+
+def test_index_foreign_keys_not_resolved_casts_only_keys():
+    resource = Resource({'name': 'people', 'data': [['id', 'age'], ['1', 'bad']], 'schema': {
+        'fields': [{'name': 'id', 'type': 'integer'}, {'name': 'age', 'type': 'integer'}]}})
+    foreign_keys = [{'fields': ['person'], 'reference': {'resource': 'people', 'fields': ['id']}}]
+    foreign_keys_values = index_foreign_keys(foreign_keys, lambda name: resource, resolve=False)
+    assert list(foreign_keys_values['people'][('id',)]) == [(1,)]
+
+
+def test_index_foreign_keys_missing_resource():
+    foreign_keys = [{'fields': ['person'], 'reference': {'resource': 'people', 'fields': ['id']}}]
+    foreign_keys_values = index_foreign_keys(foreign_keys, lambda name: None)
+    assert len(foreign_keys_values['people'][('id',)]) == 0
+
+
+def test_index_foreign_keys_missing_fields():
+    resource = Resource({'name': 'people', 'data': [['id', 'name'], ['1', 'Alex']]})
+    foreign_keys = [{'fields': ['person'], 'reference': {'resource': 'people', 'fields': ['code']}}]
+    with pytest.raises(exceptions.RelationError) as excinfo:
+        index_foreign_keys(foreign_keys, lambda name: resource)
+    assert 'code' in str(excinfo.value)
+
+
+def test_package_foreign_keys_values_are_compact():
+    package = Package({'resources': [
+        {'name': 'main', 'data': [['id', 'person'], ['1', '2']], 'schema': {
+            'fields': [{'name': 'id'}, {'name': 'person'}],
+            'foreignKeys': [{'fields': 'person', 'reference': {'resource': 'people', 'fields': 'id'}}],
+        }},
+        {'name': 'people', 'data': [['id', 'name'], ['1', 'Alex'], ['2', 'John']]},
+    ]})
+    resource = package.get_resource('main')
+    foreign_keys_values = resource.get_foreign_keys_values()
+    assert isinstance(foreign_keys_values['people'][('id',)], ForeignKeyIndex)
+    assert resource.read(relations=True) == [['1', {'id': '2', 'name': 'John'}]]
+
+
+@pytest.mark.parametrize('memory_limit', [None, 1])
+def test_package_check_relations_memory_limit(memory_limit):
+    descriptor = {'resources': [
+        {'name': 'main', 'data': [['id', 'person'], ['1', '2'], ['2', '3']], 'schema': {
+            'fields': [{'name': 'id'}, {'name': 'person'}],
+            'foreignKeys': [{'fields': 'person', 'reference': {'resource': 'people', 'fields': 'id'}}],
+        }},
+        {'name': 'people', 'data': [['id', 'name'], ['1', 'Alex'], ['2', 'John'], ['3', 'Walter']]},
+    ]}
+    resource = Package(descriptor).get_resource('main')
+    assert resource.check_relations(memory_limit=memory_limit)
+    descriptor['resources'][1]['data'].pop()
+    resource = Package(descriptor).get_resource('main')
+    with pytest.raises(exceptions.RelationError) as excinfo:
+        resource.check_relations(memory_limit=memory_limit)
+    assert 'Foreign key' in str(excinfo.value)
+
+
+def test_foreign_key_index_cache_evicts_least_recently_used():
+    indexes = []
+    for value in range(3):
+        index = ForeignKeyIndex(['id'])
+        index.add((value,))
+        indexes.append(index)
+    cache = ForeignKeyIndexCache(max_size=indexes[0].size * 2)
+    cache.set(('people', ('id',), True), indexes[0])
+    cache.set(('cities', ('id',), True), indexes[1])
+    assert cache.get(('people', ('id',), True)) is indexes[0]
+    cache.set(('countries', ('id',), True), indexes[2])
+    assert len(cache) == 2
+    assert ('cities', ('id',), True) not in cache
+    assert cache.get(('cities', ('id',), True)) is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_package_foreign_keys_indexes_are_shared():
+    foreign_key = {'fields': 'person', 'reference': {'resource': 'people', 'fields': 'id'}}
+    schema = {'fields': [{'name': 'id'}, {'name': 'person'}], 'foreignKeys': [foreign_key]}
+    package = Package({'resources': [
+        {'name': 'main1', 'data': [['id', 'person'], ['1', '1']], 'schema': schema},
+        {'name': 'main2', 'data': [['id', 'person'], ['1', '2']], 'schema': schema},
+        {'name': 'people', 'data': [['id', 'name'], ['1', 'Alex'], ['2', 'John']]},
+    ]})
+    people = package.get_resource('people')
+    with mock.patch.object(people, 'iter', wraps=people.iter) as iter_mock:
+        assert package.get_resource('main1').read(relations=True)
+        assert package.get_resource('main1').check_relations()
+        assert package.get_resource('main2').check_relations()
+        assert iter_mock.call_count == 1
+        package.add_resource({'name': 'other', 'data': [['id'], ['1']]})
+        assert package.get_resource('main1').check_relations()
+        assert iter_mock.call_count == 2
+
+
+def test_check_relations_only_tests_keys():
+    package = Package({'resources': [
+        {'name': 'main', 'data': [['id', 'person', 'age'], ['1', '2', 'bad'], ['2', '', 'bad']],
+            'schema': {
+                'fields': [
+                    {'name': 'id', 'type': 'integer'},
+                    {'name': 'person', 'type': 'integer'},
+                    {'name': 'age', 'type': 'integer'}],
+                'foreignKeys': [{'fields': 'person',
+                    'reference': {'resource': 'people', 'fields': 'id'}}],
+        }},
+        {'name': 'people', 'data': [['id', 'name'], ['1', 'Alex'], ['2', 'John']], 'schema': {
+            'fields': [{'name': 'id', 'type': 'integer'}, {'name': 'name'}]}},
+    ]})
+    resource = package.get_resource('main')
+    with mock.patch.object(Resource, 'iter', wraps=resource.iter) as iter_mock:
+        assert resource.check_relations()
+        assert not any(call[1].get('relations') for call in iter_mock.call_args_list)
+    index = resource.get_foreign_keys_values(resolve=False)['people'][('id',)]
+    assert not index.resolves
+    with pytest.raises(exceptions.CastError):
+        resource.read()
+
+
+def test_check_relations_unresolved_key():
+    package = Package({'resources': [
+        {'name': 'main', 'data': [['id', 'person'], ['1', '1'], ['2', '3']], 'schema': {
+            'fields': [{'name': 'id'}, {'name': 'person'}],
+            'foreignKeys': [{'fields': 'person', 'reference': {'resource': 'people', 'fields': 'id'}}],
+        }},
+        {'name': 'people', 'data': [['id', 'name'], ['1', 'Alex'], ['2', 'John']]},
+    ]})
+    with pytest.raises(exceptions.UnresolvedFKError) as excinfo:
+        package.get_resource('main').check_relations()
+    assert 'Foreign key "[\'person\']" violation in row "3"' in str(excinfo.value)
+
+
+def test_check_relations_self_reference_single_pass():
+    resource = Resource({'name': 'tree', 'data': [
+        ['id', 'parent_id'], ['1', ''], ['2', '3'], ['3', '1'], ['4', '4'],
+    ], 'schema': {
+        'fields': [{'name': 'id', 'type': 'integer'}, {'name': 'parent_id', 'type': 'integer'}],
+        'foreignKeys': [{'fields': 'parent_id', 'reference': {'resource': '', 'fields': 'id'}}],
+    }})
+    with mock.patch.object(Resource, 'iter', wraps=resource.iter) as iter_mock:
+        assert resource.check_relations()
+        assert iter_mock.call_count == 0
+    index = resource.get_foreign_keys_values(resolve=False)[''][('id',)]
+    assert sorted(index) == [(1,), (2,), (3,), (4,)]
+
+
+@pytest.mark.parametrize('memory_limit', [None, 1])
+def test_check_relations_self_reference_pending_unresolved(memory_limit):
+    resource = Resource({'name': 'tree', 'data': [
+        ['id', 'parent_id'], ['1', ''], ['2', '5'], ['3', '6'], ['5', '1'],
+    ], 'schema': {
+        'fields': [{'name': 'id', 'type': 'integer'}, {'name': 'parent_id', 'type': 'integer'}],
+        'foreignKeys': [{'fields': 'parent_id', 'reference': {'resource': '', 'fields': 'id'}}],
+    }})
+    with pytest.raises(exceptions.UnresolvedFKError) as excinfo:
+        resource.check_relations(memory_limit=memory_limit)
+    assert 'violation in row "4": (6,) not found' in str(excinfo.value)
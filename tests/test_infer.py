@@ -26,6 +26,14 @@ def test_infer():
                 'missingValues': ['']}}]}
 
 
+def test_infer_integrity():
+    descriptor = infer('datapackage/*.csv', base_path='data', integrity=True)
+    assert descriptor['resources'][0]['bytes'] == 27
+    assert descriptor['resources'][0]['hash'] == (
+        'sha256:a2fa39c1d05acaae6153f4fad01d3db31e071c7c5e8668576ed4e393e5f11c31')
+    assert descriptor['resources'][0]['encoding'] == 'utf-8'
+
+
 def test_infer_non_utf8_file():
     descriptor = infer('data/data_with_accents.csv')
     assert descriptor['resources'][0]['encoding'] == 'iso-8859-1'
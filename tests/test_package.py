@@ -4,6 +4,8 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
+import gc
 import os
 import six
 import sys
@@ -19,7 +21,7 @@ from copy import deepcopy
 from mock import Mock, ANY
 from tableschema import Storage
 import tableschema.exceptions
-from datapackage import Package, helpers, exceptions
+from datapackage import Package, Resource, Profile, helpers, exceptions
 
 
 # General
@@ -96,6 +98,27 @@ def test_init_accepts_text_plain_urls():
     assert pakcage.descriptor == {'profile': 'data-package', 'title': 'כותרת'}
 
 
+@httpretty.activate
+def test_init_uses_http_session():
+    url = 'http://someplace.com/datapackage.json'
+    body = json.dumps({'resources': [{
+        'name': 'name',
+        'path': 'http://someplace.com/data.csv',
+        'schema': 'http://someplace.com/schema.json',
+    }]})
+    httpretty.register_uri(httpretty.GET, url, body=body, content_type='application/json')
+    httpretty.register_uri(httpretty.GET, 'http://someplace.com/schema.json',
+        body='{"fields": [{"name": "id", "type": "integer"}]}')
+    httpretty.register_uri(httpretty.GET, 'http://someplace.com/data.csv', body='id\n1\n2\n')
+    http_session = helpers.create_http_session()
+    with mock.patch.object(http_session, 'get', wraps=http_session.get) as get_mock:
+        package = Package(url, http_session=http_session)
+        assert package.get_resource('name').read() == [[1], [2]]
+        urls = [call[0][0] for call in get_mock.call_args_list]
+        assert urls.count(url) == 1
+        assert 'http://someplace.com/schema.json' in urls
+
+
 @httpretty.activate
 def test_init_raises_if_url_doesnt_exist():
     url = 'http://someplace.com/datapackage.json'
@@ -205,6 +228,67 @@ def test_descriptor_dereferencing_uri_remote_bad():
         package = Package(descriptor)
 
 
+@httpretty.activate
+def test_descriptor_dereferencing_uri_remote_shared():
+    # Mocks
+    httpretty.register_uri(httpretty.GET,
+        'http://example.com/schema', body='{"fields": [{"name": "name"}]}')
+    httpretty.register_uri(httpretty.GET,
+        'http://example.com/dialect', body='{"delimiter": ","}')
+    # Tests
+    descriptor = {
+        'resources': [
+            {'name': 'name%s' % index, 'data': 'data',
+             'schema': 'http://example.com/schema', 'dialect': 'dialect'}
+            for index in range(3)
+        ],
+    }
+    package = Package(descriptor, base_path='http://example.com')
+    resources = package.descriptor['resources']
+    assert [resource['schema'] for resource in resources] == [
+        {'fields': [{'name': 'name'}]}] * 3
+    assert [resource['dialect']['delimiter'] for resource in resources] == [','] * 3
+    assert resources[0]['schema'] is not resources[1]['schema']
+    assert len(httpretty.latest_requests()) == 2
+
+
+@httpretty.activate
+def test_descriptor_dereferencing_uri_remote_shared_single_uri():
+    # Mocks
+    httpretty.register_uri(httpretty.GET,
+        'http://example.com/schema', body='{"fields": [{"name": "name"}]}')
+    # Tests
+    descriptor = {
+        'resources': [
+            {'name': 'name%s' % index, 'data': 'data', 'schema': 'http://example.com/schema'}
+            for index in range(20)
+        ],
+    }
+    package = Package(descriptor)
+    resources = package.descriptor['resources']
+    assert [resource['schema'] for resource in resources] == [
+        {'fields': [{'name': 'name'}]}] * 20
+    assert len(httpretty.latest_requests()) == 1
+
+
+@httpretty.activate
+def test_descriptor_dereferencing_uri_remote_shared_bad():
+    # Mocks
+    httpretty.register_uri(httpretty.GET,
+        'http://example.com/schema', body='{"fields": [{"name": "name"}]}')
+    httpretty.register_uri(httpretty.GET, 'http://example.com/dialect', status=404)
+    # Tests
+    descriptor = {
+        'resources': [
+            {'name': 'name1', 'data': 'data', 'schema': 'http://example.com/schema'},
+            {'name': 'name2', 'data': 'data', 'dialect': 'http://example.com/dialect'},
+         ],
+    }
+    with pytest.raises(exceptions.DataPackageException) as excinfo:
+        Package(descriptor)
+    assert 'http://example.com/dialect' in str(excinfo.value)
+
+
 def test_descriptor_dereferencing_uri_local():
     descriptor = {
         'resources': [
@@ -332,6 +416,189 @@ def test_package_remove_resource():
     assert resource.name == 'name'
 
 
+def test_package_add_resources():
+    package = Package({})
+    resources = package.add_resources([
+        {'name': 'name1', 'data': []},
+        {'name': 'name2', 'data': []},
+    ])
+    assert package.resource_names == ['name1', 'name2']
+    assert [resource.name for resource in resources] == ['name1', 'name2']
+
+
+def test_package_resource_names_is_a_copy():
+    package = Package({'resources': [{'name': 'name2', 'data': []}, {'name': 'name1', 'data': []}]})
+    names = package.resource_names
+    names.append('name3')
+    names.sort()
+    assert package.resource_names == ['name2', 'name1']
+    assert package.get_resource('name2').name == 'name2'
+
+
+def test_package_remove_resources():
+    package = Package({'resources': [
+        {'name': 'name1', 'data': []},
+        {'name': 'name2', 'data': []},
+        {'name': 'name3', 'data': []},
+    ]})
+    resources = package.remove_resources(['name1', 'name3', 'bad'])
+    assert package.resource_names == ['name2']
+    assert [resource.name for resource in resources] == ['name1', 'name3']
+
+
+@mock.patch('datapackage.package.Profile')
+def test_package_add_resources_validates_once(profile_class_mock):
+    package = Package({})
+    profile_class_mock.reset_mock()
+    package.add_resources([{'name': 'name%s' % index, 'data': []} for index in range(10)])
+    assert profile_class_mock.return_value._validate_package.call_count == 1
+
+
+def test_package_add_resource_keeps_other_resources():
+    package = Package({'resources': [{'name': 'name1', 'data': []}]})
+    resource = package.resources[0]
+    package.add_resource({'name': 'name2', 'data': []})
+    assert package.resources[0] is resource
+    assert package.resource_names == ['name1', 'name2']
+
+
+def test_package_remove_resource_keeps_other_resources():
+    package = Package({'resources': [
+        {'name': 'name1', 'data': []},
+        {'name': 'name2', 'data': []},
+        {'name': 'name3', 'data': []},
+    ]})
+    resource = package.resources[2]
+    package.remove_resource('name2')
+    assert package.resources[1] is resource
+    assert package.resource_names == ['name1', 'name3']
+
+
+def test_package_incremental_validation_errors():
+    package = Package({'resources': [{'name': 'Bad Name', 'data': []}]})
+    assert len(package.errors) == 1
+    assert 'at "resources/0/name" in descriptor' in str(package.errors[0])
+    assert 'at "properties/resources/items/properties/name/pattern" in profile' in str(package.errors[0])
+    package.add_resource({'name': 'name', 'data': []})
+    assert len(package.errors) == 1
+    package.descriptor['resources'].insert(0, {'name': 'Bad Name', 'data': []})
+    package.commit()
+    assert len(package.errors) == 2
+    assert 'at "resources/1/name" in descriptor' in str(package.errors[1])
+    package.remove_resource('Bad Name')
+    assert package.valid
+
+
+def test_package_incremental_validation_errors_match_profile_validation():
+    descriptor = {'name': 'Bad Name', 'resources': [
+        {'name': 'name', 'data': [], 'bytes': 'bytes'},
+        {'name': 'Bad Name', 'data': []},
+    ]}
+    package = Package(descriptor)
+    with pytest.raises(exceptions.ValidationError) as excinfo:
+        Profile('data-package').validate(package.descriptor)
+    assert sorted(map(str, package.errors)) == sorted(map(str, excinfo.value.errors))
+
+
+def test_package_strict_validation_fails_fast():
+    descriptor = {'resources': [
+        {'name': 'Bad Name', 'data': []},
+        {'name': 'Bad Name 2', 'data': []},
+    ]}
+    with pytest.raises(exceptions.ValidationError) as excinfo:
+        Package(descriptor, strict=True)
+    assert len(excinfo.value.errors) == 1
+    package = Package(descriptor)
+    with pytest.raises(exceptions.ValidationError) as excinfo:
+        package.commit(strict=True)
+    assert len(excinfo.value.errors) == 1
+    package.commit(strict=False)
+    assert len(package.errors) == 2
+
+
+def test_package_resources_are_validated_once():
+    descriptor = {'resources': [
+        {'name': 'name1', 'data': ['data']},
+        {'name': 'Bad Name', 'data': ['data']},
+    ]}
+    with mock.patch.object(Profile, 'validate', autospec=True) as validate_mock:
+        package = Package(descriptor)
+        assert validate_mock.call_count == 0
+    assert package.resources[0].valid
+    assert not package.resources[1].valid
+    resource = Resource({'name': 'Bad Name', 'data': ['data']})
+    assert list(map(str, package.resources[1].errors)) == list(map(str, resource.errors))
+
+
+def test_package_resources_with_other_profile_are_validated():
+    descriptor = {'resources': [
+        {'name': 'name', 'data': ['data'], 'profile': 'tabular-data-resource'},
+    ]}
+    with mock.patch.object(Profile, 'validate', autospec=True) as validate_mock:
+        Package(descriptor)
+        assert validate_mock.call_count == 1
+
+
+def test_package_get_resource_index():
+    package = Package({'resources': [
+        {'name': 'name1', 'data': ['data1']},
+        {'name': 'name2', 'data': ['data2']},
+    ]})
+    assert package.get_resource('name2').source == ['data2']
+    package.descriptor['resources'][1]['name'] = 'renamed'
+    package.commit()
+    assert package.get_resource('name2') is None
+    assert package.get_resource('renamed').source == ['data2']
+    assert package.resource_names == ['name1', 'renamed']
+    package.add_resource({'name': 'name3', 'data': ['data3']})
+    package.remove_resource('name1')
+    assert package.get_resource('name1') is None
+    assert package.get_resource('name3') is package.resources[1]
+    assert package.resource_names == ['renamed', 'name3']
+
+
+def test_package_get_resource_index_duplicated_names():
+    package = Package({'resources': [
+        {'name': 'name', 'data': ['data1']},
+        {'name': 'name', 'data': ['data2']},
+    ]})
+    assert package.get_resource('name').source == ['data1']
+
+
+def test_package_lazy_resources():
+    descriptor = {'resources': [
+        {'name': 'name1', 'data': ['data1']},
+        {'name': 'name2', 'path': '../unsafe.csv'},
+        {'name': 'name3', 'data': ['data3']},
+    ]}
+    with pytest.raises(exceptions.DataPackageException):
+        Package(descriptor)
+    package = Package(descriptor, lazy=True)
+    assert len(package.resources) == 3
+    assert package.resource_names == ['name1', 'name2', 'name3']
+    assert package.get_resource('name3').source == ['data3']
+    assert package.resources[0].source == ['data1']
+    assert package.resources[-1] is package.get_resource('name3')
+    with pytest.raises(exceptions.DataPackageException):
+        package.resources[1]
+
+
+def test_package_lazy_resources_validates_package():
+    package = Package({'resources': [{'name': 'Bad Name', 'data': []}]}, lazy=True)
+    assert len(package.errors) == 1
+    with pytest.raises(exceptions.ValidationError):
+        Package({'resources': [{'name': 'Bad Name', 'data': []}]}, strict=True, lazy=True)
+
+
+def test_package_lazy_resources_add_remove():
+    package = Package({'resources': [{'name': 'name1', 'data': []}]}, lazy=True)
+    resource = package.add_resource({'name': 'name2', 'data': []})
+    assert resource.name == 'name2'
+    assert package.resources == [package.get_resource('name1'), resource]
+    assert package.remove_resource('name1').name == 'name1'
+    assert package.resource_names == ['name2']
+
+
 # Resources
 
 def test_base_path_cant_be_set_directly():
@@ -443,11 +710,103 @@ def test_can_remove_resource_from_descriptor_in_place():
     assert package.resources[0].source == '万事开头难'
 
 
+def test_package_isolates_caller_inline_data():
+    descriptor = {'resources': [{'name': 'name', 'data': [['id'], ['1']]}]}
+    package = Package(descriptor)
+    resource_descriptor = {'name': 'added', 'data': [['id'], ['1']]}
+    package.add_resource(resource_descriptor)
+    descriptor['resources'][0]['data'].append(['2'])
+    resource_descriptor['data'].append(['2'])
+    assert package.get_resource('name').read() == [['1']]
+    assert package.get_resource('added').read() == [['1']]
+    assert package.descriptor['resources'][0]['data'] == [['id'], ['1']]
+    assert package.descriptor['resources'][1]['data'] == [['id'], ['1']]
+    assert not package.commit()
+
+
+def test_package_inline_data_changes_are_committed():
+    package = Package({'resources': [{'name': 'name', 'data': [['id'], ['1']]}]})
+    package.descriptor['resources'][0]['data'].append(['2'])
+    assert package.resources[0].source == [['id'], ['1']]
+    assert package.commit()
+    assert package.resources[0].source == [['id'], ['1'], ['2']]
+    assert not package.commit()
+
+
+def test_package_commit_keeps_unchanged_resources():
+    package = Package({'resources': [
+        {'name': 'name1', 'data': ['data1']},
+        {'name': 'name2', 'data': ['data2']},
+    ]})
+    resource1, resource2 = package.resources
+    package.descriptor['title'] = 'title'
+    package.descriptor['resources'][1]['title'] = 'title'
+    assert package.commit()
+    assert package.resources[0] is resource1
+    assert package.resources[1] is not resource2
+    assert package.resources[1].descriptor['title'] == 'title'
+    assert package.descriptor['title'] == 'title'
+
+
+def test_package_commit_strict_reuses_only_first_resource_error():
+    descriptor = {'resources': [{'name': 'Bad Name', 'path': 'data.csv', 'title': 1}]}
+    package = Package(descriptor)
+    assert len(package.errors) == 2
+    with pytest.raises(exceptions.ValidationError) as excinfo1:
+        Package(descriptor, strict=True)
+    with pytest.raises(exceptions.ValidationError) as excinfo2:
+        package.commit(strict=True)
+    assert len(excinfo2.value.errors) == len(excinfo1.value.errors) == 1
+
+
+def test_package_commit_not_modified():
+    package = Package({'resources': [{'name': 'name', 'data': ['data']}]})
+    package.descriptor['resources'][0]['name'] = 'name'
+    assert not package.commit()
+
+
+def test_package_commit_not_modified_only_compares_descriptors():
+    # No-op commits must stay as cheap as a plain descriptor comparison
+    package = Package({'resources': [
+        {'name': 'name%s' % index, 'data': [['id'], ['1']]} for index in range(100)]})
+    package.descriptor['resources'][0]['name'] = 'name0'
+    with mock.patch('datapackage.package.deepcopy') as deepcopy_mock:
+        assert not package.commit()
+        assert not deepcopy_mock.called
+
+
 def test_resources_have_public_backreference_to_package():
     package = Package('data/datapackage/datapackage.json')
     assert package.get_resource('data').package == package
 
 
+# Integrity
+
+@pytest.mark.parametrize('workers', [1, 4])
+@httpretty.activate
+def test_check_integrity(workers):
+    httpretty.register_uri(httpretty.GET, 'http://example.com/data.csv', body='id\n1\n')
+    package = Package({'resources': [
+        {'name': 'local', 'path': 'data/data.csv', 'bytes': 63,
+            'hash': 'sha256:328adab247692a1a405e83c2625d52e366389eabf8a1824931187877e8644774'},
+        {'name': 'local-bad', 'path': 'data/data.csv', 'bytes': 64},
+        {'name': 'remote', 'path': 'http://example.com/data.csv', 'bytes': 5},
+        {'name': 'multipart', 'path': ['data/chunk1.csv', 'data/chunk2.csv'],
+            'hash': 'md5:bad'},
+        {'name': 'inline', 'data': [['id'], [1]]},
+        {'name': 'missing', 'path': 'data/missing.csv', 'bytes': 1},
+    ]}, base_path='.')
+    report = package.check_integrity(workers=workers)
+    assert [item['name'] for item in report] == [
+        'local', 'local-bad', 'remote', 'multipart', 'inline', 'missing']
+    assert [item['valid'] for item in report] == [True, False, True, False, True, False]
+    assert isinstance(report[1]['error'], exceptions.IntegrityError)
+    assert 'size "63"' in str(report[1]['error'])
+    assert isinstance(report[3]['error'], exceptions.IntegrityError)
+    assert isinstance(report[5]['error'], exceptions.DataPackageException)
+    assert report[0]['error'] is None
+
+
 # Save to json
 
 def test_save_as_json(json_tmpfile):
@@ -609,6 +968,66 @@ def test_should_raise_if_zipfile_raised_LargeZipFile(zipfile_mock, tmpfile):
         package.save(tmpfile)
 
 
+def test_saves_with_compression(tmpfile):
+    descriptor = {'resources': [{'name': 'name', 'format': 'txt', 'path': 'unicode.txt'}]}
+    package = Package(descriptor, default_base_path='data')
+    package.save(tmpfile.name, compression=zipfile.ZIP_DEFLATED, compression_level=9)
+    with zipfile.ZipFile(tmpfile.name, 'r') as z:
+        assert z.getinfo('data/name.txt').compress_type == zipfile.ZIP_DEFLATED
+        assert z.read('data/name.txt').decode('utf-8') == '万事开头难\n'
+
+
+def test_saves_without_remote_resources_by_default(tmpfile):
+    descriptor = {'resources': [{'name': 'name', 'path': 'http://example.com/data.csv'}]}
+    package = Package(descriptor)
+    package.save(tmpfile.name)
+    with zipfile.ZipFile(tmpfile.name, 'r') as z:
+        assert z.namelist() == ['datapackage.json']
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+@httpretty.activate
+def test_saves_with_remote_resources(tmpfile, workers):
+    httpretty.register_uri(httpretty.GET, 'http://example.com/data1.csv', body='id\n1\n')
+    httpretty.register_uri(httpretty.GET, 'http://example.com/data2.csv', body='id\n2\n')
+    descriptor = {'resources': [
+        {'name': 'data1', 'format': 'csv', 'path': 'http://example.com/data1.csv'},
+        {'name': 'data2', 'format': 'csv', 'path': 'http://example.com/data2.csv'},
+    ]}
+    package = Package(descriptor)
+    package.save(tmpfile.name, compression=zipfile.ZIP_DEFLATED,
+        include_remote=True, workers=workers)
+    with zipfile.ZipFile(tmpfile.name, 'r') as z:
+        assert z.read('data/data1.csv') == b'id\n1\n'
+        assert z.read('data/data2.csv') == b'id\n2\n'
+    package = Package(tmpfile.name)
+    assert package.get_resource('data1').source.endswith('data1.csv')
+    assert package.get_resource('data1').local
+    assert package.get_resource('data2').read() == [['2']]
+
+
+@httpretty.activate
+def test_saves_with_integrity(tmpfile):
+    httpretty.register_uri(httpretty.GET, 'http://example.com/data.csv', body='id\n1\n')
+    descriptor = {'resources': [
+        {'name': 'local', 'format': 'csv', 'path': 'data.csv'},
+        {'name': 'remote', 'format': 'csv', 'path': 'http://example.com/data.csv'},
+    ]}
+    package = Package(descriptor, default_base_path='data')
+    package.save(tmpfile.name, include_remote=True, integrity=True)
+    package = Package(tmpfile.name)
+    assert package.descriptor['resources'][0]['bytes'] == 63
+    assert package.descriptor['resources'][0]['hash'] == (
+        'sha256:328adab247692a1a405e83c2625d52e366389eabf8a1824931187877e8644774')
+    assert package.descriptor['resources'][1]['bytes'] == 5
+    assert all(item['valid'] for item in package.check_integrity())
+    httpretty.register_uri(httpretty.GET, 'http://example.com/data.csv', status=404)
+    descriptor = {'resources': [{'name': 'name', 'path': 'http://example.com/data.csv'}]}
+    package = Package(descriptor)
+    with pytest.raises(exceptions.DataPackageException):
+        package.save(tmpfile.name, include_remote=True)
+
+
 # Load from zip
 
 @pytest.mark.skip(reason='Wait for specs-v1.rc2 resource.data/path')
@@ -691,6 +1110,132 @@ def test_it_breaks_if_theres_more_than_one_datapackage_json(tmpfile):
         Package(tmpfile.name, {})
 
 
+def test_local_descriptor_path_makes_no_http_requests():
+    with mock.patch('datapackage.helpers.get_http_session') as get_http_session_mock:
+        Package('data/datapackage/datapackage.json')
+        assert get_http_session_mock.call_count == 0
+
+
+def test_it_works_with_zip_contents():
+    package = Package(_make_zip_contents())
+    assert package.descriptor['name'] == 'name'
+    assert package.get_resource('name').read() == [['1']]
+
+
+@httpretty.activate
+def test_it_works_with_remote_zip_files():
+    url = 'http://someplace.com/package.zip'
+    httpretty.register_uri(httpretty.GET, url,
+        body=_make_zip_contents(), content_type='application/zip')
+    package = Package(url)
+    assert package.descriptor['name'] == 'name'
+    assert package.get_resource('name').read() == [['1']]
+    assert len(httpretty.latest_requests()) == 1
+
+
+@httpretty.activate
+def test_it_works_with_remote_zip_files_without_extension():
+    url = 'http://someplace.com/package'
+    httpretty.register_uri(httpretty.GET, url,
+        body=_make_zip_contents(), content_type='application/octet-stream')
+    with mock.patch('tempfile.SpooledTemporaryFile', wraps=tempfile.SpooledTemporaryFile) as spool:
+        package = Package(url)
+        assert spool.call_count == 1
+    assert package.descriptor['name'] == 'name'
+    assert len(httpretty.latest_requests()) == 1
+
+
+@httpretty.activate
+def test_it_works_with_remote_descriptor_without_extension():
+    url = 'http://someplace.com/package'
+    httpretty.register_uri(httpretty.GET, url,
+        body=json.dumps({'name': 'name', 'resources': []}), content_type='text/plain')
+    package = Package(url)
+    assert package.descriptor['name'] == 'name'
+    assert len(httpretty.latest_requests()) == 1
+
+
+def test_it_breaks_if_zip_is_corrupted():
+    with pytest.raises(exceptions.DataPackageException) as excinfo:
+        Package(_make_zip_contents()[:100])
+    assert 'Unable to open zip' in str(excinfo.value)
+
+
+def test_it_works_with_zip_native(tmpfile):
+    tempdirs_glob = os.path.join(tempfile.gettempdir(), '*-datapackage')
+    original_tempdirs = glob.glob(tempdirs_glob)
+    tmpfile.write(_make_zip_contents(compression=zipfile.ZIP_DEFLATED))
+    tmpfile.flush()
+    with Package(tmpfile.name, zip_native=True) as package:
+        resource = package.get_resource('name')
+        assert resource.local
+        assert resource.source == os.path.join(os.path.abspath(tmpfile.name), 'data.csv')
+        assert resource.read() == [['1']]
+        assert resource.read() == [['1']]
+        assert resource.raw_read() == b'id\n1\n'
+    assert not set(glob.glob(tempdirs_glob)) - set(original_tempdirs)
+
+
+def test_it_works_with_zip_native_contents():
+    package = Package(_make_zip_contents(), zip_native=True)
+    assert package.descriptor['name'] == 'name'
+    assert package.get_resource('name').read(keyed=True) == [{'id': '1'}]
+    package.close()
+
+
+@pytest.mark.parametrize('zip_native', [False, True])
+def test_it_dereferences_local_uris_inside_zip(zip_native):
+    descriptor = {'name': 'name', 'resources': [
+        {'name': 'name', 'path': 'data/data.csv',
+            'schema': 'schema.json', 'dialect': 'dialect.json'}]}
+    stream = io.BytesIO()
+    with zipfile.ZipFile(stream, 'w') as z:
+        z.writestr('datapackage.json', json.dumps(descriptor))
+        z.writestr('schema.json', json.dumps({'fields': [{'name': 'id', 'type': 'integer'}]}))
+        z.writestr('dialect.json', json.dumps({'delimiter': ';'}))
+        z.writestr('data/data.csv', 'id\n1\n')
+    with Package(stream.getvalue(), zip_native=zip_native) as package:
+        resource = package.get_resource('name')
+        assert resource.descriptor['schema']['fields'][0]['name'] == 'id'
+        assert resource.descriptor['dialect']['delimiter'] == ';'
+        assert resource.read() == [[1]]
+
+
+def test_it_saves_zip_native_package(tmpdir):
+    target = str(tmpdir.join('package.zip'))
+    with Package(_make_zip_contents(), zip_native=True) as package:
+        package.get_resource('name').descriptor['format'] = 'csv'
+        package.commit()
+        package.save(target)
+    with Package(target) as package:
+        assert package.get_resource('name').read() == [['1']]
+
+
+def test_it_removes_temporary_directory_on_close():
+    package = Package(_make_zip_contents())
+    tempdir = os.path.dirname(package.get_resource('name').source)
+    assert os.path.isdir(tempdir)
+    package.close()
+    assert not os.path.exists(tempdir)
+
+
+def test_it_removes_temporary_directory_on_del():
+    package = Package(_make_zip_contents())
+    tempdir = os.path.dirname(package.get_resource('name').source)
+    del package
+    gc.collect()
+    assert not os.path.exists(tempdir)
+
+
+def _make_zip_contents(compression=zipfile.ZIP_STORED):
+    descriptor = {'name': 'name', 'resources': [{'name': 'name', 'path': 'data.csv'}]}
+    stream = io.BytesIO()
+    with zipfile.ZipFile(stream, 'w', compression) as z:
+        z.writestr('datapackage.json', json.dumps(descriptor))
+        z.writestr('data.csv', 'id\n1\n')
+    return stream.getvalue()
+
+
 # Deprecated
 
 def test_init_uses_base_schema_by_default():
@@ -704,7 +1249,11 @@ def test_schema_gets_from_registry_if_available(registry_class_mock):
     registry_mock = mock.MagicMock()
     registry_mock.get.return_value = schema
     registry_class_mock.return_value = registry_mock
-    assert Package().schema.to_dict() == schema
+    Profile.clear_cache()
+    try:
+        assert Package().schema.to_dict() == schema
+    finally:
+        Profile.clear_cache()
 
 
 def test_to_dict_value_can_be_altered_without_changing_the_package():
@@ -7,10 +7,11 @@ from __future__ import unicode_literals
 import io
 import os
 import json
+import mock
 import pytest
 import requests
 import httpretty
-from datapackage import Profile, exceptions
+from datapackage import Profile, exceptions, compiler
 
 
 # Tests
@@ -227,6 +228,119 @@ def test_iter_validation_returns_no_errors_if_data_is_valid():
     assert len(errors) == 0
 
 
+def test_validate_fail_fast():
+    profile = Profile('data-package')
+    descriptor = {'name': 1, 'resources': [{'name': 'Name', 'data': ['data']}]}
+    with pytest.raises(exceptions.ValidationError) as excinfo:
+        profile.validate(descriptor)
+    assert len(excinfo.value.errors) == 2
+    with pytest.raises(exceptions.ValidationError) as excinfo:
+        profile.validate(descriptor, fail_fast=True)
+    assert len(excinfo.value.errors) == 1
+
+
+def test_is_valid():
+    profile = Profile('data-package')
+    assert profile.is_valid({'resources': [{'name': 'name', 'data': ['data']}]})
+    assert not profile.is_valid({'name': 1, 'resources': []})
+
+
+# Cache
+
+def test_profile_cache_shares_compiled_profile():
+    profile1 = Profile('data-package')
+    profile2 = Profile('data-package')
+    assert profile1.jsonschema is profile2.jsonschema
+
+
+def test_profile_cache_loads_registry_once():
+    Profile.clear_cache()
+    try:
+        with mock.patch('datapackage.registry.Registry') as registry_class_mock:
+            registry_class_mock.return_value.get.return_value = {'foo': 'bar'}
+            Profile('data-package')
+            Profile('data-package')
+            assert registry_class_mock.call_count == 1
+    finally:
+        Profile.clear_cache()
+
+
+def test_profile_cache_clear():
+    profile1 = Profile('data-package')
+    Profile.clear_cache('data-package')
+    profile2 = Profile('data-package')
+    assert profile1.jsonschema is not profile2.jsonschema
+    assert profile1.jsonschema == profile2.jsonschema
+
+
+def test_profile_cache_doesnt_share_dict_profiles():
+    schema_dict = {'foo': 'bar'}
+    assert Profile(schema_dict).jsonschema is not Profile(schema_dict).jsonschema
+
+
+# Compiled
+
+@pytest.mark.parametrize('descriptor', [
+    {'resources': [{'name': 'name', 'data': ['data']}]},
+    {'resources': [{'name': 'name', 'path': ['chunk1.csv', 'chunk2.csv']}]},
+    {'name': 'name', 'resources': [], 'licenses': [{'name': 'MIT'}]},
+    {'resources': []},
+    {'resources': [{'name': 'Name', 'data': ['data']}]},
+    {'resources': [{'name': 'name', 'path': 1}]},
+    {'resources': [{'name': 'name', 'path': ['chunk1.csv', 'chunk1.csv']}]},
+    {'resources': [{'name': 'name', 'data': ['data'], 'licenses': [{}]}]},
+    {'name': 1, 'resources': [{'name': 'name', 'data': ['data']}]},
+])
+def test_profile_compiled_check_matches_jsonschema(descriptor, tmpdir):
+    profile = Profile('data-package')
+    check = compiler.compile_schema(
+        profile.jsonschema, type(profile._validator), cache_dir=str(tmpdir))
+    valid = not list(profile._validator.iter_errors(descriptor))
+    assert check(descriptor) is valid
+
+
+def test_profile_compiled_validate_has_same_errors():
+    descriptor = {'name': 1, 'resources': [{'name': 'Name', 'data': ['data']}]}
+    with pytest.raises(exceptions.ValidationError) as excinfo1:
+        Profile('data-package').validate(descriptor)
+    with pytest.raises(exceptions.ValidationError) as excinfo2:
+        Profile('data-package', compiled=True).validate(descriptor)
+    assert list(map(str, excinfo1.value.errors)) == list(map(str, excinfo2.value.errors))
+
+
+def test_profile_compiled_validate_skips_jsonschema_if_valid():
+    profile = Profile('data-package', compiled=True)
+    with mock.patch.object(type(profile._validator), 'iter_errors') as iter_errors_mock:
+        assert profile.validate({'resources': [{'name': 'name', 'data': ['data']}]})
+        assert iter_errors_mock.call_count == 0
+
+
+def test_profile_compiled_source_is_cached_on_disk(tmpdir):
+    profile = Profile('data-resource')
+    compiler.compile_schema(
+        profile.jsonschema, type(profile._validator), cache_dir=str(tmpdir))
+    assert len(tmpdir.listdir()) == 1
+    with mock.patch('datapackage.compiler._Generator') as generator_mock:
+        check = compiler.compile_schema(
+            profile.jsonschema, type(profile._validator), cache_dir=str(tmpdir))
+        assert generator_mock.call_count == 0
+    assert check({'name': 'name', 'data': ['data']})
+
+
+def test_profile_compiled_not_supported_schema():
+    profile = Profile({'$ref': '#/definitions/foo', 'definitions': {'foo': {}}})
+    assert compiler.compile_schema(
+        profile.jsonschema, type(profile._validator), cache_dir='') is None
+
+
+def test_profile_compiled_not_supported_jsonschema_version():
+    # jsonschema<3.0 validators have no TYPE_CHECKER
+    class Validator(object):
+        pass
+    profile = Profile('data-package')
+    assert compiler.compile_schema(profile.jsonschema, Validator, cache_dir='') is None
+
+
 # TODO: recover https://github.com/frictionlessdata/specs/issues/616
 
 #  @pytest.mark.skipif(os.environ.get('TRAVIS_BRANCH') != 'master', reason='CI')
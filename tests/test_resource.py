@@ -6,6 +6,8 @@ from __future__ import unicode_literals
 
 import io
 import json
+import hashlib
+import mock
 import pytest
 import httpretty
 from copy import deepcopy
@@ -14,7 +16,7 @@ from functools import partial
 from tableschema import Storage
 from datapackage.resource import Resource
 from datapackage.helpers import expand_resource_descriptor as expand
-from datapackage import exceptions
+from datapackage import exceptions, helpers
 
 
 # Resource.descriptor (retrieve)
@@ -65,6 +67,33 @@ def test_descriptor_retrieve_url_bad(patch_get):
         Resource(descriptor).descriptor
 
 
+def test_descriptor_isolates_caller_inline_data():
+    descriptor = {'name': 'name', 'data': [['id'], ['1']]}
+    resource = Resource(descriptor)
+    descriptor['data'].append(['2'])
+    assert resource.read() == [['1']]
+    assert resource.descriptor['data'] == [['id'], ['1']]
+    assert resource.descriptor['data'] is not resource.source
+    assert not resource.commit()
+
+
+def test_descriptor_commit_inline_data():
+    resource = Resource({'name': 'name', 'data': [['id'], ['1']]})
+    resource.descriptor['data'].append(['2'])
+    assert resource.read() == [['1']]
+    assert resource.commit()
+    assert resource.read() == [['1'], ['2']]
+    assert not resource.commit()
+
+
+def test_descriptor_commit_not_modified_only_compares_descriptors():
+    resource = Resource({'name': 'name', 'data': [['id']] + [[index] for index in range(1000)]})
+    resource.descriptor['name'] = 'name'
+    with mock.patch('datapackage.resource.deepcopy') as deepcopy_mock:
+        assert not resource.commit()
+        assert not deepcopy_mock.called
+
+
 # Resource.descriptor (dereference)
 
 def test_descriptor_dereference():
@@ -361,6 +390,26 @@ def test_source_multipart_remote():
     assert resource.multipart == True
 
 
+@httpretty.activate
+def test_source_multipart_remote_read_uses_http_session():
+    httpretty.register_uri(httpretty.GET,
+        'http://example.com/chunk1.csv', body='id,name\n1,english\n')
+    httpretty.register_uri(httpretty.GET,
+        'http://example.com/chunk2.csv', body='id,name\n2,german')
+    descriptor = {
+        'name': 'name',
+        'profile': 'tabular-data-resource',
+        'path': ['http://example.com/chunk1.csv', 'http://example.com/chunk2.csv'],
+        'schema': {'fields': [{'name': 'id', 'type': 'integer'}, {'name': 'name'}]},
+    }
+    http_session = helpers.create_http_session()
+    with mock.patch.object(http_session, 'get', wraps=http_session.get) as get_mock:
+        resource = Resource(descriptor, http_session=http_session)
+        assert resource.read() == [[1, 'english'], [2, 'german']]
+        urls = set(call[0][0] for call in get_mock.call_args_list)
+        assert urls == set(descriptor['path'])
+
+
 def test_source_multipart_remote_path_relative_and_base_path_remote():
     descriptor = {
         'name': 'name',
@@ -782,6 +831,66 @@ def test_check_integrity_error():
     assert DESCRIPTOR['hash'].replace('sha256:', '') in str(excinfo.value)
 
 
+@pytest.mark.parametrize('algorithm', ['md5', 'sha1', 'sha256', 'sha512'])
+def test_check_integrity_hash_algorithms(algorithm):
+    with io.open('data/data.csv', 'rb') as file:
+        contents = file.read()
+    descriptor = deepcopy(DESCRIPTOR)
+    descriptor['hash'] = '%s:%s' % (algorithm, hashlib.new(algorithm, contents).hexdigest())
+    resource = Resource(descriptor)
+    assert resource.check_integrity()
+    descriptor['hash'] = '%s:%s' % (algorithm, hashlib.new(algorithm, b'').hexdigest())
+    resource = Resource(descriptor)
+    with pytest.raises(exceptions.IntegrityError) as excinfo:
+        resource.check_integrity()
+    assert hashlib.new(algorithm, contents).hexdigest() in str(excinfo.value)
+
+
+def test_check_integrity_not_supported_hash_is_skipped():
+    descriptor = deepcopy(DESCRIPTOR)
+    descriptor['hash'] = 'sha384:bad'
+    resource = Resource(descriptor)
+    assert resource.check_integrity()
+
+
+def test_check_integrity_does_not_parse_data():
+    descriptor = deepcopy(DESCRIPTOR)
+    resource = Resource(descriptor)
+    with mock.patch.object(Resource, 'iter') as iter_mock:
+        assert resource.check_integrity()
+        assert iter_mock.call_count == 0
+
+
+def test_check_integrity_remote(patch_get):
+    patch_get('http://example.com/data.csv', body='id\n1\n')
+    descriptor = {
+        'path': 'http://example.com/data.csv',
+        'bytes': 5,
+        'hash': 'md5:%s' % hashlib.md5(b'id\n1\n').hexdigest(),
+    }
+    resource = Resource(descriptor)
+    assert resource.check_integrity()
+    descriptor['bytes'] = 6
+    resource = Resource(descriptor)
+    with pytest.raises(exceptions.IntegrityError):
+        resource.check_integrity()
+
+
+def test_infer_integrity():
+    resource = Resource({'path': 'data/data.csv'})
+    descriptor = resource.infer(integrity=True)
+    assert descriptor['bytes'] == DESCRIPTOR['bytes']
+    assert descriptor['hash'] == DESCRIPTOR['hash']
+    assert resource.check_integrity()
+
+
+def test_infer_integrity_keeps_declared_values():
+    resource = Resource({'path': 'data/data.csv', 'bytes': 1, 'hash': 'md5:bad'})
+    descriptor = resource.infer(integrity=True)
+    assert descriptor['bytes'] == 1
+    assert descriptor['hash'] == 'md5:bad'
+
+
 # Deprecated
 
 def test_data():
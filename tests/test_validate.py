@@ -20,3 +20,10 @@ def test_validate_invalid():
         validate({})
     assert len(excinfo.value.errors) == 1
     assert 'resources' in str(excinfo.value.errors[0])
+
+
+def test_validate_invalid_fails_fast():
+    descriptor = {'name': 1, 'resources': [{'name': 'Name', 'data': ['data']}]}
+    with pytest.raises(exceptions.ValidationError) as excinfo:
+        validate(descriptor)
+    assert len(excinfo.value.errors) == 1